@@ -0,0 +1,38 @@
+"""
+Parses generated configurations of growing size, the time must grow linearly with the number of lines.
+
+Usage: python benchmarks/line_numbers.py [engine] [lines ...]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gixy.parser.nginx_parser import get_raw_parser, DEFAULT_PARSER_ENGINE  # noqa: E402
+
+
+def generate(lines):
+    """
+    Returns http block with the lines of directives with comments and map blocks.
+    """
+    half = lines // 2
+    directives = "".join('    add_header X-{0} "v{0}"; # c\n'.format(i) for i in range(half))
+    maps = "".join("    map $a{0} $b{0} {{ default 1; }}\n".format(i) for i in range(half))
+    return "http {\n" + directives + maps + "}\n"
+
+
+def main():
+    engine = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PARSER_ENGINE
+    sizes = [int(x) for x in sys.argv[2:]] or [10000, 25000, 50000]
+    parser = get_raw_parser(engine)
+    for lines in sizes:
+        config = generate(lines)
+        start = time.perf_counter()
+        parser.parse(config)
+        print("{0:8} lines {1:.2f}s".format(lines, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares the raw parser engines on the configuration files of the test corpus.
+
+Usage: python benchmarks/parser_engines.py [repeat]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyparsing import ParseException  # noqa: E402
+
+from gixy.parser.nginx_parser import PARSER_ENGINES  # noqa: E402
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+
+
+def load_corpus():
+    corpus = []
+    for root, _, files in os.walk(TESTS_DIR):
+        for name in sorted(files):
+            if name.endswith(".conf"):
+                with open(os.path.join(root, name), "rb") as f:
+                    corpus.append(f.read())
+    return corpus
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    corpus = load_corpus()
+    print("{0} files, {1:.0f}KB".format(len(corpus), sum(len(data) for data in corpus) / 1024.0))
+    for engine, parser_cls in sorted(PARSER_ENGINES.items()):
+        parser = parser_cls()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for data in corpus:
+                try:
+                    parser.parse(data)
+                except ParseException:
+                    pass
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print("{0:10} {1:.3f}s".format(engine, best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Measures PluginsManager.audit dispatch of directives to the plugins, plugins themselves do nothing.
+
+Usage: python benchmarks/plugins_dispatch.py [directives]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gixy.core.plugins_manager import PluginsManager  # noqa: E402
+from gixy.directives.directive import Directive  # noqa: E402
+
+NAMES = ["add_header", "proxy_pass", "root", "listen", "server_name", "index", "location", "set", "gzip", "expires"]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    manager = PluginsManager()
+    for plugin in manager.plugins:
+        # Only the dispatch is measured
+        plugin.audit = lambda directive: None
+    directives = [Directive(NAMES[i % len(NAMES)], []) for i in range(count)]
+
+    def run():
+        for directive in directives:
+            manager.audit(directive)
+
+    elapsed = min(timeit.repeat(run, number=1, repeat=5))
+    print("{0:.1f}ms, {1:.2f}us per directive".format(elapsed * 1000, elapsed / count * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Measures warm Regexp character queries on typical location regexes.
+
+Usage: python benchmarks/regexp_queries.py [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gixy.core.regexp import Regexp  # noqa: E402
+
+SOURCES = [
+    r"^/api/(?P<v>v[0-9]+)/(?P<name>[a-z_\-]+)\.(json|xml)$",
+    r"^/(?:static|media)/(.+)$",
+    r"^/admin/.*\.php$",
+    r"^/([^/]+)/([^/]+)/?$",
+    r"[a-z]+\.example\.com$",
+    r"^/(\d+)-(.*)\.html$",
+]
+CHARS = "\n\r/ .?#\"'<>"
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    regexps = [Regexp(source) for source in SOURCES]
+    for regexp in regexps:
+        # Parse the regexes before the measurement
+        regexp.can_contain("a")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for regexp in regexps:
+            for char in CHARS:
+                regexp.can_contain(char)
+                regexp.can_startswith(char)
+                regexp.must_contain(char)
+                regexp.must_startswith(char)
+    queries = rounds * len(regexps) * len(CHARS) * 4
+    print("{0:.2f}us per query".format((time.perf_counter() - start) / queries * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@
 from configargparse import *
 from six.moves import StringIO
 
-from gixy.core.plugins_manager import PluginsManager
+from gixy.core.plugins_manager import get_registry
 
 # used while parsing args to keep track of where they came from
 _COMMAND_LINE_SOURCE_KEY = "command_line"
@@ -86,13 +86,10 @@ class GixyHelpFormatter(HelpFormatter):
     """Custom help formatter for Gixy."""
 
     def format_help(self):
-        manager = PluginsManager()
         help_message = super(GixyHelpFormatter, self).format_help()
         if "plugins options:" in help_message:
             # Print available blugins _only_ if we prints options for it
-            plugins = "\n".join(
-                "\t" + plugin.__name__ for plugin in manager.plugins_classes
-            )
+            plugins = "\n".join("\t" + name for name in get_registry())
             help_message = f"{help_message}\n\navailable plugins:\n{plugins}\n"
         return help_message
 
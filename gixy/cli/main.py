@@ -8,10 +8,12 @@ import copy
 import gixy
 from gixy.core.manager import Manager as Gixy
 from gixy.formatters import get_all as formatters
-from gixy.core.plugins_manager import PluginsManager
+from gixy.core.plugins_manager import get_registry as get_plugins_registry
 from gixy.core.config import Config
 from gixy.cli.argparser import create_parser
 from gixy.core.exceptions import InvalidConfiguration
+from gixy.parser.cache import ParseCache
+from gixy.parser.nginx_parser import PARSER_ENGINES, DEFAULT_PARSER_ENGINE
 
 LOG = logging.getLogger()
 
@@ -36,6 +38,78 @@ def _create_plugin_help(option):
     return "Default: {0}".format(default)
 
 
+def _audit(path, config, parse_cache, formatter):
+    """
+    Audits the configuration file, returns its reports, stats and whether it is invalid
+    """
+    invalid = False
+    with Gixy(config=config, parse_cache=parse_cache) as yoda:
+        try:
+            if path == "-":
+                with os.fdopen(sys.stdin.fileno(), "rb") as fdata:
+                    yoda.audit("<stdin>", fdata, is_stdin=True)
+            else:
+                with open(path, mode="rb") as fdata:
+                    yoda.audit(path, fdata, is_stdin=False)
+        except InvalidConfiguration:
+            invalid = True
+        return formatter.prepare_reports(yoda), yoda.stats, invalid
+
+
+_worker = {}
+
+
+def _init_worker(debug, config):
+    _init_logger(debug)
+    # Included files are parsed in the worker itself
+    config = copy.copy(config)
+    config.jobs = 1
+    _worker["config"] = config
+    _worker["parse_cache"] = ParseCache(cache_dir=config.cache_dir)
+    _worker["formatter"] = formatters()[config.output_format]()
+
+
+def _audit_job(path):
+    """
+    Audits the configuration file in the worker, returns the _audit result and the parse cache stats of the file
+    """
+    parse_cache = _worker["parse_cache"]
+    hits, misses = parse_cache.hits, parse_cache.misses
+    result = _audit(path, _worker["config"], parse_cache, _worker["formatter"])
+    return result, {"hits": parse_cache.hits - hits, "misses": parse_cache.misses - misses}
+
+
+def _audit_all(nginx_files, config, debug):
+    """
+    Yields (path, reports, stats, invalid) of the configuration files in the order of the files
+    """
+    if config.jobs > 1 and len(nginx_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(
+            max_workers=config.jobs, initializer=_init_worker, initargs=(debug, config)
+        )
+        parse_stats = {"hits": 0, "misses": 0}
+        with executor:
+            for path, (result, stats) in zip(nginx_files, executor.map(_audit_job, nginx_files)):
+                parse_stats["hits"] += stats["hits"]
+                parse_stats["misses"] += stats["misses"]
+                yield (path,) + result
+        if config.cache_dir:
+            LOG.debug("Parse cache: {hits} hits, {misses} misses".format(**parse_stats))
+        return
+
+    formatter = formatters()[config.output_format]()
+    parse_cache = ParseCache(cache_dir=config.cache_dir, jobs=config.jobs)
+    try:
+        for path in nginx_files:
+            yield (path,) + _audit(path, config, parse_cache, formatter)
+    finally:
+        parse_cache.close()
+    if config.cache_dir:
+        LOG.debug("Parse cache: {hits} hits, {misses} misses".format(**parse_cache.stats))
+
+
 def _get_cli_parser():
     parser = create_parser()
     parser.add_argument(
@@ -76,6 +150,14 @@ def _get_cli_parser():
         "-o", "--output", dest="output_file", type=str, help="Write report to file"
     )
 
+    parser.add_argument(
+        "--omit-config",
+        dest="omit_config",
+        action="store_true",
+        default=False,
+        help="Do not include configuration snippets in the reports",
+    )
+
     parser.add_argument(
         "-d",
         "--debug",
@@ -101,13 +183,37 @@ def _get_cli_parser():
         help='Disable "include" directive processing',
     )
 
+    parser.add_argument(
+        "--parser-engine",
+        dest="parser_engine",
+        choices=sorted(PARSER_ENGINES.keys()),
+        default=DEFAULT_PARSER_ENGINE,
+        type=str,
+        help="Nginx configuration parser to use",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        help="Directory to cache parsed configuration files between runs, e.g. ~/.cache/gixy",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of processes to audit configuration files and parse included files with",
+    )
+
     group = parser.add_argument_group("plugins options")
-    for plugin_cls in PluginsManager().plugins_classes:
-        name = plugin_cls.__name__
-        if not plugin_cls.options:
+    for name, plugin in get_plugins_registry().items():
+        if not plugin["options"]:
             continue
 
-        options = copy.deepcopy(plugin_cls.options)
+        options = copy.deepcopy(plugin["options"])
         for opt_key, opt_val in options.items():
             option_name = "--{plugin}-{key}".format(plugin=name, key=opt_key).replace(
                 "_", "-"
@@ -126,6 +232,11 @@ def _get_cli_parser():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from gixy.cli.serve import main as serve_main
+
+        serve_main(sys.argv[2:])
+
     parser = _get_cli_parser()
     args = parser.parse_args()
     _init_logger(args.debug)
@@ -180,11 +291,14 @@ def main():
         plugins=tests,
         skips=skips,
         allow_includes=not args.disable_includes,
+        parser_engine=args.parser_engine,
+        cache_dir=os.path.expanduser(args.cache_dir) if args.cache_dir else None,
+        jobs=max(args.jobs, 1),
+        omit_config=args.omit_config,
     )
 
-    for plugin_cls in PluginsManager().plugins_classes:
-        name = plugin_cls.__name__
-        options = copy.deepcopy(plugin_cls.options)
+    for name, plugin in get_plugins_registry().items():
+        options = copy.deepcopy(plugin["options"])
         for opt_key, opt_val in options.items():
             option_name = "{name}:{key}".format(name=name, key=opt_key)
             if option_name not in args:
@@ -204,26 +318,28 @@ def main():
         config.set_for(name, options)
 
     formatter = formatters()[config.output_format]()
+    output = None
+    if formatter.streaming and args.output_file:
+        output = formatter.output = open(config.output_file, "w")
+
     failed = False
-    for path in nginx_files:
-        with Gixy(config=config) as yoda:
-            try:
-                if path == "-":
-                    with os.fdopen(sys.stdin.fileno(), "rb") as fdata:
-                        yoda.audit("<stdin>", fdata, is_stdin=True)
-                else:
-                    with open(path, mode="rb") as fdata:
-                        yoda.audit(path, fdata, is_stdin=False)
-            except InvalidConfiguration:
-                failed = True
-            formatter.feed(path, yoda)
-            failed = failed or sum(yoda.stats.values()) > 0
-
-    if args.output_file:
-        with open(config.output_file, "w") as f:
-            f.write(formatter.flush())
-    else:
-        print(formatter.flush())
+    try:
+        for path, reports, stats, invalid in _audit_all(nginx_files, config, args.debug):
+            formatter.feed_reports(path, reports, stats)
+            failed = failed or invalid or sum(stats.values()) > 0
+        if formatter.streaming:
+            # Reports are already written, flush writes the rest of the output
+            formatter.flush()
+    finally:
+        if output:
+            output.close()
+
+    if not formatter.streaming:
+        if args.output_file:
+            with open(config.output_file, "w") as f:
+                f.write(formatter.flush())
+        else:
+            print(formatter.flush())
 
     if failed:
         # If something found - exit code must be 1, otherwise 0
@@ -0,0 +1,314 @@
+"""Gixy server, audits configuration files on requests over a Unix socket"""
+
+import io
+import errno
+import os
+import sys
+import copy
+import json
+import stat
+import logging
+import argparse
+import signal
+import socket
+import socketserver
+import threading
+
+import gixy
+from gixy.cli.main import _init_logger
+from gixy.core.manager import Manager as Gixy
+from gixy.core.plugins_manager import get_registry as get_plugins_registry
+from gixy.core.config import Config
+from gixy.core.exceptions import InvalidConfiguration
+from gixy.formatters.json import JsonFormatter, report_to_dict
+from gixy.parser.cache import ParseCache
+from gixy.parser.nginx_parser import PARSER_ENGINES, DEFAULT_PARSER_ENGINE
+
+LOG = logging.getLogger(__name__)
+
+BOOLEANS = {"true": True, "yes": True, "on": True, "1": True, "false": False, "no": False, "off": False, "0": False}
+
+REQUEST_FIELDS = frozenset([
+    "path", "config", "severity", "tests", "skips", "disable_includes", "omit_config", "parser_engine", "options"])
+
+
+class RequestError(Exception):
+    pass
+
+
+def _plugin_option(default, value):
+    """
+    Returns the plugin option value converted to the type of its default, collections may be given as
+    JSON arrays or as comma-separated strings like on the command line
+    """
+    if isinstance(default, (tuple, list, set)):
+        if isinstance(value, str):
+            value = [x.strip() for x in value.split(",")]
+        elif not isinstance(value, list):
+            raise RequestError("Expected a list or a string, got {0!r}".format(value))
+        return type(default)(value)
+    if isinstance(default, bool):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in BOOLEANS:
+            return BOOLEANS[value.strip().lower()]
+        raise RequestError("Expected a boolean, got {0!r}".format(value))
+    if isinstance(value, (dict, list)):
+        raise RequestError("Expected a scalar, got {0!r}".format(value))
+    return type(default)(value)
+
+
+def build_config(request, defaults):
+    """
+    Returns the audit Config of the request, missing options are taken from the server ones.
+
+    :param dict request: audit request, see audit for the fields.
+    :param Config defaults: config of the server.
+    """
+    unknown = set(request) - REQUEST_FIELDS
+    if unknown:
+        raise RequestError("Unknown request fields: {0}".format(", ".join(sorted(unknown))))
+
+    severity = request.get("severity", defaults.severity)
+    if severity not in gixy.severity.ALL:
+        raise RequestError("Unknown severity: {0!r}".format(severity))
+    parser_engine = request.get("parser_engine", defaults.parser_engine)
+    if parser_engine not in PARSER_ENGINES:
+        raise RequestError("Unknown parser engine: {0!r}".format(parser_engine))
+
+    for field in ("tests", "skips"):
+        if not isinstance(request.get(field, []), list):
+            raise RequestError('Expected a list of plugins in "{0}"'.format(field))
+    for field in ("disable_includes", "omit_config"):
+        if not isinstance(request.get(field, False), bool):
+            raise RequestError('Expected a boolean in "{0}"'.format(field))
+
+    config = Config(
+        severity=severity,
+        output_format="json",
+        plugins=request.get("tests", defaults.plugins),
+        skips=request.get("skips", defaults.skips),
+        allow_includes=not request.get("disable_includes", not defaults.allow_includes),
+        parser_engine=parser_engine,
+        cache_dir=defaults.cache_dir,
+        omit_config=request.get("omit_config", defaults.omit_config),
+    )
+
+    options = request.get("options", {})
+    if not isinstance(options, dict) or not all(isinstance(x, dict) for x in options.values()):
+        raise RequestError('Expected options of the plugins by their names in "options"')
+    registry = get_plugins_registry()
+    for name, plugin_options in options.items():
+        if name not in registry:
+            raise RequestError("Unknown plugin: {0}".format(name))
+        for key in plugin_options:
+            if key not in registry[name]["options"]:
+                raise RequestError("Unknown option of the {0} plugin: {1}".format(name, key))
+
+    for name, plugin in registry.items():
+        plugin_options = copy.deepcopy(plugin["options"])
+        for key, value in options.get(name, {}).items():
+            try:
+                plugin_options[key] = _plugin_option(plugin_options[key], value)
+            except (TypeError, ValueError) as e:
+                raise RequestError("Invalid option {0}:{1}: {2}".format(name, key, e))
+        config.set_for(name, plugin_options)
+    return config
+
+
+def audit(request, defaults, parse_cache):
+    """
+    Returns the response to the audit request.
+
+    The request must contain the "path" of the configuration file or the "config" content itself. With the
+    inline config the optional path is used in the reports and to resolve the included files.
+    The "severity", "tests", "skips", "disable_includes", "omit_config", "parser_engine" fields and the
+    plugin "options" (e.g. {"origins": {"domains": ["example.com"]}}) override the server ones.
+
+    :return dict: the path, reports in the json format, stats and whether the configuration is invalid.
+    """
+    if not isinstance(request, dict):
+        raise RequestError("Expected a JSON object")
+    config = build_config(request, defaults)
+
+    path = request.get("path")
+    content = request.get("config")
+    if content is None:
+        if path is None:
+            raise RequestError('Either "path" or "config" is required')
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            with open(path, mode="rb") as f:
+                content = f.read()
+        except (IOError, OSError) as e:
+            raise RequestError("Failed to read {0}: {1}".format(path, e.strerror))
+    elif not isinstance(content, str):
+        raise RequestError('Expected a string in "config"')
+    else:
+        content = content.encode("utf-8")
+
+    # Files changed since the previous request are parsed again
+    parse_cache.refresh()
+
+    invalid = False
+    formatter = JsonFormatter()
+    with Gixy(config=config, parse_cache=parse_cache) as yoda:
+        try:
+            if path is None:
+                yoda.audit("<stdin>", io.BytesIO(content), is_stdin=True)
+            else:
+                yoda.audit(path, io.BytesIO(content), is_stdin=False)
+        except InvalidConfiguration:
+            invalid = True
+        reports = formatter.prepare_reports(yoda)
+        stats = yoda.stats
+
+    path = path or "<stdin>"
+    return {
+        "path": path,
+        "reports": [report_to_dict(path, report) for report in reports],
+        "stats": stats,
+        "invalid": invalid,
+    }
+
+
+def handle_request(line, defaults, parse_cache):
+    """
+    Returns the response line to the request line, errors are returned as {"error": message}
+    """
+    try:
+        response = audit(json.loads(line), defaults, parse_cache)
+    except ValueError as e:
+        response = {"error": "Invalid request: {0}".format(e)}
+    except RequestError as e:
+        response = {"error": str(e)}
+    except Exception as e:
+        # The server must survive the plugin failures
+        LOG.exception("Failed to handle the request")
+        response = {"error": "Internal error: {0}".format(e)}
+    return json.dumps(response, sort_keys=True) + "\n"
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads newline-delimited JSON requests of a connection and writes a JSON response line to each of them
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            with self.server.audit_lock:
+                response = handle_request(line, self.server.defaults, self.server.parse_cache)
+            self.wfile.write(response.encode("utf-8"))
+            self.wfile.flush()
+
+
+class GixyServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves each connection in its own thread, so a persistent connection does not block the other clients.
+    The audits are run one by one though, since the audit context is global.
+
+    The plugin modules, raw parser grammar, regexp caches and the parsed included files are kept
+    between the requests. Included files are parsed again once their mtime or size is changed.
+
+    The socket is accessible by the owner only, since the server reads any file it can on request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, defaults):
+        self.defaults = defaults
+        self.parse_cache = ParseCache(cache_dir=defaults.cache_dir)
+        self.audit_lock = threading.Lock()
+        _remove_stale_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+
+    def server_bind(self):
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        self.parse_cache.close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(path):
+    """
+    Removes the socket left by a server that is not running anymore
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except OSError:
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(errno.EADDRINUSE, "Another server is listening")
+    finally:
+        sock.close()
+
+
+def _get_cli_parser():
+    parser = argparse.ArgumentParser(
+        prog="gixy serve",
+        description="Audit nginx configuration files on JSON requests over a Unix socket",
+    )
+    parser.add_argument(
+        "--socket", dest="socket", type=str, required=True, help="Path to the Unix socket, e.g. /run/gixy.sock"
+    )
+    parser.add_argument(
+        "-d", "--debug", dest="debug", action="store_true", default=False, help="Turn on debug mode"
+    )
+    parser.add_argument(
+        "--parser-engine",
+        dest="parser_engine",
+        choices=sorted(PARSER_ENGINES.keys()),
+        default=DEFAULT_PARSER_ENGINE,
+        type=str,
+        help="Default nginx configuration parser to use",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        help="Directory to cache parsed configuration files between runs, e.g. ~/.cache/gixy",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = _get_cli_parser().parse_args(argv)
+    _init_logger(args.debug)
+
+    defaults = Config(
+        parser_engine=args.parser_engine,
+        cache_dir=os.path.expanduser(args.cache_dir) if args.cache_dir else None,
+    )
+    try:
+        server = GixyServer(args.socket, defaults)
+    except OSError as e:
+        sys.stderr.write("Failed to listen on {0}: {1}\n".format(args.socket, e.strerror or e))
+        sys.exit(1)
+
+    # The socket is removed on termination as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    LOG.info("Listening on {0}".format(args.socket))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    sys.exit(0)
@@ -1,4 +1,6 @@
-from gixy.core.regexp import Regexp
+import functools
+
+from gixy.core.regexp import get_regexp
 from gixy.core.variable import Variable
 
 BUILTIN_VARIABLES = {
@@ -238,31 +240,55 @@ BUILTIN_VARIABLES = {
 }
 
 
+# Names of the prefixed variable families, e.g. "http_", are stored in the trie of chars,
+# the None key of a node holds the prefix ending there
+BUILTIN_PREFIX_TRIE = {}
+for _builtin in BUILTIN_VARIABLES:
+    if _builtin.endswith('_'):
+        _node = BUILTIN_PREFIX_TRIE
+        for _char in _builtin:
+            _node = _node.setdefault(_char, {})
+        _node[None] = _builtin
+
+
+def _match_builtin(name):
+    """
+    Returns the BUILTIN_VARIABLES key for the variable name, the exact name or the longest prefix.
+    """
+    if name in BUILTIN_VARIABLES and not name.endswith('_'):
+        return name
+
+    node = BUILTIN_PREFIX_TRIE
+    result = None
+    for char in name:
+        node = node.get(char)
+        if node is None:
+            break
+        result = node.get(None, result)
+    return result
+
+
 def is_builtin(name):
     if isinstance(name, int):
         # Indexed variables can't be builtin
         return False
-    for builtin in BUILTIN_VARIABLES:
-        if builtin.endswith('_'):
-            if name.startswith(builtin):
-                return True
-        elif name == builtin:
-            return True
-    return False
+    return _match_builtin(name) is not None
 
 
+@functools.lru_cache(maxsize=4096)
 def builtin_var(name):
-    for builtin, regexp in BUILTIN_VARIABLES.items():
-        if builtin.endswith('_'):
-            if not name.startswith(builtin):
-                continue
-        elif name != builtin:
-            continue
+    """
+    Returns Variable of the builtin variable, shared between the callers and must not be modified.
+    """
+    builtin = _match_builtin(name)
+    if builtin is None:
+        return None
+
+    regexp = BUILTIN_VARIABLES[builtin]
+    if regexp:
+        return Variable(name=name, value=get_regexp(regexp, strict=True, case_sensitive=False))
+    return Variable(name=name, value='builtin', have_script=False)
 
-        if regexp:
-            return Variable(name=name, value=Regexp(regexp, strict=True, case_sensitive=False))
-        return Variable(name=name, value='builtin', have_script=False)
-    return None
 
 def fake_var(name):
     return Variable(name=name, value=name, have_script=False)
@@ -8,13 +8,21 @@ class Config(object):
                  severity=gixy.severity.UNSPECIFIED,
                  output_format=None,
                  output_file=None,
-                 allow_includes=True):
+                 allow_includes=True,
+                 parser_engine='pyparsing',
+                 cache_dir=None,
+                 jobs=1,
+                 omit_config=False):
         self.severity = severity
         self.output_format = output_format
         self.output_file = output_file
         self.plugins = plugins
         self.skips = skips
         self.allow_includes = allow_includes
+        self.parser_engine = parser_engine
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.omit_config = omit_config
         self.plugins_options = {}
 
     def set_for(self, name, options):
@@ -1,5 +1,7 @@
 import logging
 import copy
+import itertools
+from collections import ChainMap
 
 from gixy.core.utils import is_indexed_name
 
@@ -7,6 +9,8 @@ LOG = logging.getLogger(__name__)
 
 CONTEXTS = []
 
+_scope_versions = itertools.count()
+
 
 def get_context():
     return CONTEXTS[-1]
@@ -18,7 +22,7 @@ def purge_context():
 
 def push_context(block):
     if len(CONTEXTS):
-        context = copy.deepcopy(get_context())
+        context = get_context().new_child()
     else:
         context = Context()
     context.set_block(block)
@@ -31,19 +35,43 @@ def pop_context():
 
 
 class Context(object):
-    def __init__(self):
+    """
+    Variables scope of a block.
+
+    Variables are stored in chains of dicts: a nested scope adds its own dict in front of the parent ones,
+    so it shares the parent variables without copying them, and new variables are visible in this scope only.
+
+    The version identifies the set of visible variables: a nested scope has the version of its parent until
+    variables are changed. Compiled scripts are cached by version in compiled_scripts, shared by nested scopes.
+    """
+
+    def __init__(self, parent=None):
         self.block = None
-        self.variables = {
-            'index': {},
-            'name': {}
-        }
+        if parent is None:
+            self.variables = {
+                'index': ChainMap(),
+                'name': ChainMap()
+            }
+            self.version = next(_scope_versions)
+            self.compiled_scripts = {}
+        else:
+            self.variables = {
+                'index': parent.variables['index'].new_child(),
+                'name': parent.variables['name'].new_child()
+            }
+            self.version = parent.version
+            self.compiled_scripts = parent.compiled_scripts
+
+    def new_child(self):
+        return Context(parent=self)
 
     def set_block(self, directive):
         self.block = directive
         return self
 
     def clear_index_vars(self):
-        self.variables['index'] = {}
+        self.variables['index'] = ChainMap()
+        self.version = next(_scope_versions)
         return self
 
     def add_var(self, name, var):
@@ -55,6 +83,7 @@ class Context(object):
 
         key = (var.ctx, name) if var.ctx else name
         self.variables[var_type][key] = var
+        self.version = next(_scope_versions)
         return self
 
     def get_var(self, name, ctx=None):
@@ -94,7 +123,9 @@ class Context(object):
         memo[id(self)] = result
         result.block = copy.copy(self.block)
         result.variables = {
-            'index': copy.copy(self.variables['index']),
-            'name': copy.copy(self.variables['name'])
+            'index': ChainMap(dict(self.variables['index'])),
+            'name': ChainMap(dict(self.variables['name']))
         }
+        result.version = self.version
+        result.compiled_scripts = self.compiled_scripts
         return result
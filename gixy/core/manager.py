@@ -4,28 +4,50 @@ import logging
 import gixy
 from gixy.core.plugins_manager import PluginsManager
 from gixy.core.context import get_context, pop_context, push_context, purge_context
+from gixy.core.variable import compile_script_stats, variable_query_stats
+from gixy.core.regexp import regexp_cache_info
 from gixy.directives.directive import MapDirective
 from gixy.parser.nginx_parser import NginxParser
+from gixy.parser.cache import ParseCache
 from gixy.core.config import Config
 
 LOG = logging.getLogger(__name__)
 
 
+def _stats_since(stats, start):
+    """
+    Returns the counters accumulated since the start snapshot, the module counters are kept for the whole process.
+    """
+    return dict((key, value - start[key]) for key, value in stats.items())
+
+
 class Manager(object):
-    def __init__(self, config=None):
+    def __init__(self, config=None, parse_cache=None):
         self.root = None
         self.config = config or Config()
         self.auditor = PluginsManager(config=self.config)
+        self._own_parse_cache = parse_cache is None
+        self.parse_cache = parse_cache or ParseCache(cache_dir=self.config.cache_dir, jobs=self.config.jobs)
 
     def audit(self, file_path, file_data, is_stdin=False):
         LOG.debug("Audit config file: {fname}".format(fname=file_path))
+        compile_script_start = dict(compile_script_stats)
+        variable_query_start = dict(variable_query_stats)
         parser = NginxParser(
             cwd=os.path.dirname(file_path) if not is_stdin else '',
-            allow_includes=self.config.allow_includes)
+            allow_includes=self.config.allow_includes,
+            engine=self.config.parser_engine,
+            cache=self.parse_cache)
         self.root = parser.parse(content=file_data.read(), path_info=file_path)
 
         push_context(self.root)
         self._audit_recursive(self.root.children)
+        self.auditor.post_audit()
+        LOG.debug("Compiled scripts cache: {hits} hits, {misses} misses".format(
+            **_stats_since(compile_script_stats, compile_script_start)))
+        LOG.debug("Variable queries cache: {hits} evaluations saved, {misses} evaluated".format(
+            **_stats_since(variable_query_stats, variable_query_start)))
+        LOG.debug("Regexp cache: {0.hits} hits, {0.misses} misses".format(regexp_cache_info()))
 
     @property
     def results(self):
@@ -72,3 +94,5 @@ class Manager(object):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         purge_context()
+        if self._own_parse_cache:
+            self.parse_cache.close()
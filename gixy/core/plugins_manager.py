@@ -1,22 +1,118 @@
 import os
+import hashlib
+import logging
+import importlib
 
 import gixy
 from gixy.plugins.plugin import Plugin
 
+LOG = logging.getLogger(__name__)
+
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins")
+REGISTRY_FILE = "_registry.py"
+
+_registry = None
+
+
+def plugins_digest():
+    """
+    Returns digest of the plugins sources, the generated registry is stale if its digest differs.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(PLUGINS_DIR)):
+        if not name.endswith(".py") or name == REGISTRY_FILE:
+            continue
+        with open(os.path.join(PLUGINS_DIR, name), "rb") as f:
+            digest.update(name.encode("utf-8") + b"\0" + f.read() + b"\0")
+    return digest.hexdigest()
+
+
+def build_registry():
+    """
+    Imports all the plugins and returns their metadata by the plugin name, in the order of the names.
+    """
+    manager = PluginsManager()
+    registry = {}
+    for plugin_cls in sorted(manager.plugins_classes, key=lambda cls: cls.__name__):
+        registry[plugin_cls.__name__] = {
+            "module": plugin_cls.__module__,
+            "severity": plugin_cls.severity,
+            "directives": list(plugin_cls.directives),
+            "options": plugin_cls.options,
+        }
+    return registry
+
+
+def write_registry():
+    """
+    Generates the plugins registry, must be called after every change of the plugins.
+    """
+    path = os.path.join(PLUGINS_DIR, REGISTRY_FILE)
+    with open(path, "w") as f:
+        f.write("# Generated by `python -m gixy.core.plugins_manager`, do not edit.\n")
+        f.write("# Metadata of the plugins, so they are not imported to list them and their options.\n\n")
+        f.write("DIGEST = {0!r}\n\n".format(plugins_digest()))
+        f.write("PLUGINS = {\n")
+        for name, metadata in build_registry().items():
+            f.write("    {0!r}: {{\n".format(name))
+            for key, value in metadata.items():
+                f.write("        {0!r}: {1},\n".format(key, _literal(value)))
+            f.write("    },\n")
+        f.write("}\n")
+    return path
+
+
+def _literal(value):
+    """
+    Returns Python literal of the plugin metadata value, sets are sorted to keep the registry reproducible.
+    """
+    if isinstance(value, dict):
+        return "{" + ", ".join("{0!r}: {1}".format(k, _literal(v)) for k, v in sorted(value.items())) + "}"
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            return "set()"
+        return "{" + ", ".join(_literal(x) for x in sorted(value)) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_literal(x) for x in value) + "]"
+    if isinstance(value, tuple):
+        return "(" + ", ".join(_literal(x) for x in value) + ("," if len(value) == 1 else "") + ")"
+    return repr(value)
+
+
+def get_registry():
+    """
+    Returns metadata of the plugins by the plugin name: module, severity, directives and options.
+
+    Metadata is read from the generated registry, the plugins are imported only if the registry is stale.
+    """
+    global _registry
+    if _registry is None:
+        try:
+            from gixy.plugins import _registry as generated
+            if generated.DIGEST == plugins_digest():
+                _registry = generated.PLUGINS
+        except ImportError:
+            pass
+
+        if _registry is None:
+            LOG.debug("Plugins registry is stale, regenerate it with `python -m gixy.core.plugins_manager`")
+            _registry = build_registry()
+    return _registry
+
 
 class PluginsManager(object):
     def __init__(self, config=None):
         self.imported = False
         self.config = config
         self._plugins = []
+        self._dispatch_table = None
+        self._wildcard_plugins = None
 
     def import_plugins(self):
         if self.imported:
             return
 
-        files_list = os.listdir(
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugins")
-        )
+        files_list = os.listdir(PLUGINS_DIR)
         for plugin_file in files_list:
             if not plugin_file.endswith(".py") or plugin_file.startswith("_"):
                 continue
@@ -27,13 +123,11 @@ class PluginsManager(object):
         self.imported = True
 
     def init_plugins(self):
-        self.import_plugins()
-
         exclude = self.config.skips if self.config else None
         include = self.config.plugins if self.config else None
         severity = self.config.severity if self.config else None
-        for plugin_cls in Plugin.__subclasses__():
-            name = plugin_cls.__name__
+        # Only the modules of the plugins to run are imported
+        for name, metadata in get_registry().items():
             if include and name not in include:
                 # Skip not needed plugins
                 continue
@@ -41,10 +135,11 @@ class PluginsManager(object):
                 # Skipped plugins
                 continue
             if severity and not gixy.severity.is_acceptable(
-                plugin_cls.severity, severity
+                metadata["severity"], severity
             ):
                 # Skip plugin by severity level
                 continue
+            plugin_cls = getattr(importlib.import_module(metadata["module"]), name)
             if self.config and self.config.has_for(name):
                 options = self.config.get_for(name)
             else:
@@ -65,12 +160,32 @@ class PluginsManager(object):
     def get_plugins_descriptions(self):
         return map(lambda a: a.name, self.plugins)
 
+    def plugins_for(self, name):
+        """
+        Returns tuple of the plugins interested in directives with the name, in the order of the plugins
+        """
+        if self._dispatch_table is None:
+            self._build_dispatch_table()
+        return self._dispatch_table.get(name, self._wildcard_plugins)
+
     def audit(self, directive):
-        for plugin in self.plugins:
-            if plugin.directives and directive.name not in plugin.directives:
-                continue
+        for plugin in self.plugins_for(directive.name):
             plugin.audit(directive)
 
+    def post_audit(self):
+        for plugin in self.plugins:
+            plugin.post_audit()
+
+    def _build_dispatch_table(self):
+        plugins = self.plugins
+        # Plugins without directives audit all of them (e.g. if_is_evil)
+        self._wildcard_plugins = tuple(p for p in plugins if not p.directives)
+        names = set(name for p in plugins for name in p.directives)
+        self._dispatch_table = dict(
+            (name, tuple(p for p in plugins if not p.directives or name in p.directives))
+            for name in names
+        )
+
     def issues(self):
         result = []
         for plugin in self.plugins:
@@ -78,3 +193,7 @@ class PluginsManager(object):
                 continue
             result.extend(plugin.issues)
         return result
+
+
+if __name__ == "__main__":
+    print("Plugins registry is written to {0}".format(write_registry()))
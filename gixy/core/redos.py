@@ -0,0 +1,376 @@
+import logging
+from collections import Counter
+
+import gixy.core.sre_parse.sre_parse as sre_parse
+from gixy.core.regexp import (
+    AnyToken, LiteralToken, NotLiteralToken, RangeToken, CategoryToken, InToken, NegateToken,
+    AtToken, BranchToken, SubpatternToken, InternalSubpatternToken, MinRepeatToken, MaxRepeatToken,
+    GroupRefToken, ALL_MASK)
+
+LOG = logging.getLogger(__name__)
+
+# Repeats with a bigger upper bound are analysed as unbounded ones
+MAX_BOUNDED_REPEAT = 10
+# Bigger automata are not analysed and reported with the "unknown" status
+MAX_POSITIONS = 200
+MAX_STEPS = 1000000
+
+# Characters are represented as bits of the ASCII chars and one more bit for all the other chars
+OTHER_CHARS = 1 << 128
+ANY_CHAR = ALL_MASK | OTHER_CHARS
+NEWLINE = 1 << ord("\n")
+
+_OTHER_CATEGORIES = frozenset([
+    sre_parse.CATEGORY_NOT_DIGIT,
+    sre_parse.CATEGORY_NOT_SPACE,
+    sre_parse.CATEGORY_WORD,
+    sre_parse.CATEGORY_NOT_WORD,
+])
+
+_LETTERS = [(ord(c), ord(c.swapcase())) for c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+
+
+class TooComplex(Exception):
+    pass
+
+
+def analyze(regexp):
+    """
+    Statically checks the backtracking complexity of the regex.
+
+    The regex is compiled into the position (Glushkov) automaton over the character classes,
+    exponential complexity is reported when a loop can match the same string in two different ways
+    and polynomial one when a string can be matched by chained loops in several ways.
+    The loop must be followed by a failure, e.g. "^(a+)+" is matched at once, but "^(a+)+$" is not.
+    The implicit ".*?" prefix of the unanchored regexes is not taken into account.
+
+    :param Regexp regexp: regexp to check.
+    :return dict: report in the recheck format, e.g. {"status": "vulnerable", "complexity": {"summary": "exponential"}}
+    """
+    try:
+        automaton = _Automaton(regexp)
+        return automaton.check()
+    except TooComplex:
+        return {"status": "unknown", "complexity": None}
+    except (sre_parse.error, RecursionError) as e:
+        LOG.debug("Failed to analyze regex %s: %s", regexp.source, e)
+        return {"status": "unknown", "complexity": None}
+
+
+def _degree_summary(degree):
+    suffix = {2: "nd", 3: "rd"}.get(degree, "th")
+    return "{0}{1} degree polynomial".format(degree, suffix)
+
+
+class _Fragment(object):
+    """
+    Positions the fragment may start and end with. Nullable is the number of the ways to match the empty
+    string, up to 2, since sre_parse factors the common prefix out of the branches, e.g. "(a|a)" is "a(?:|)".
+    """
+
+    __slots__ = ("first", "last", "nullable")
+
+    def __init__(self, first, last, nullable):
+        self.first = first
+        self.last = last
+        self.nullable = nullable
+
+
+class _Automaton(object):
+    def __init__(self, regexp):
+        self.case_sensitive = regexp.case_sensitive
+        self.masks = []
+        self.follow = []
+        self.steps = 0
+        root = self._build(regexp.root)
+        self.first = Counter(root.first)
+        self.accepting = root.last
+
+    def check(self):
+        reachable = self._reachable()
+        sccs = self._sccs(reachable)
+
+        # Loops which may end the match at once are not dangerous
+        loops = [
+            scc for scc in sccs
+            if (len(scc) > 1 or scc[0] in self.follow[scc[0]]) and not any(s in self.accepting for s in scc)
+        ]
+        for scc in loops:
+            if self._is_ambiguous_loop(scc):
+                return {"status": "vulnerable", "complexity": {"summary": "exponential"}}
+
+        degree = self._polynomial_degree(loops)
+        if degree > 1:
+            return {"status": "vulnerable", "complexity": {"summary": _degree_summary(degree)}}
+        return {"status": "safe", "complexity": {"summary": "linear"}}
+
+    def _is_ambiguous_loop(self, scc):
+        """
+        Checks if two different paths of the loop match the same string.
+        """
+        members = set(scc)
+        for state in scc:
+            for target, count in self.follow[state].items():
+                if count > 1 and target in members:
+                    return True
+
+        # Pairs of the loop states reachable by the same string
+        edges = {}
+        for p in scc:
+            for q in scc:
+                edges[(p, q)] = [
+                    (p2, q2)
+                    for p2 in self.follow[p] if p2 in members
+                    for q2 in self.follow[q] if q2 in members and self.masks[p2] & self.masks[q2]
+                ]
+                self._step(len(edges[(p, q)]))
+
+        for pair_scc in _tarjan(list(edges), edges.__getitem__):
+            diagonal = any(p == q for p, q in pair_scc)
+            if diagonal and any(p != q for p, q in pair_scc):
+                return True
+        return False
+
+    def _polynomial_degree(self, loops):
+        """
+        Returns the maximum count of the loops chained so that the same string can be matched by each of them.
+        """
+        chained = dict((idx, set()) for idx in range(len(loops)))
+        for left in range(len(loops)):
+            reachable = self._reachable(loops[left])
+            for right in range(len(loops)):
+                if left == right or loops[right][0] not in reachable:
+                    continue
+                if self._is_chained(loops[left], loops[right]):
+                    chained[left].add(right)
+
+        degrees = {}
+
+        def degree(idx):
+            if idx not in degrees:
+                degrees[idx] = 1 + max([degree(x) for x in chained[idx]] or [0])
+            return degrees[idx]
+
+        return max([degree(idx) for idx in chained] or [1])
+
+    def _is_chained(self, left, right):
+        """
+        Checks if there is a string w that p -w-> p, p -w-> q and q -w-> q for a state p of the left loop
+        and a state q of the right one.
+        """
+        left_states = set(left)
+        right_states = set(right)
+        for p in left:
+            for q in right:
+                start = (p, p, q)
+                seen = set([start])
+                stack = [start]
+                while stack:
+                    x, y, z = stack.pop()
+                    for x2 in self.follow[x]:
+                        if x2 not in left_states:
+                            continue
+                        for z2 in self.follow[z]:
+                            if z2 not in right_states:
+                                continue
+                            chars = self.masks[x2] & self.masks[z2]
+                            if not chars:
+                                continue
+                            for y2 in self.follow[y]:
+                                if not chars & self.masks[y2]:
+                                    continue
+                                state = (x2, y2, z2)
+                                if state == (p, q, q):
+                                    return True
+                                if state not in seen:
+                                    self._step(1)
+                                    seen.add(state)
+                                    stack.append(state)
+        return False
+
+    def _reachable(self, states=None):
+        if states is None:
+            states = self.first
+        seen = set(p for p in states if self.masks[p])
+        stack = list(seen)
+        while stack:
+            for target in self.follow[stack.pop()]:
+                if target not in seen and self.masks[target]:
+                    seen.add(target)
+                    stack.append(target)
+        return seen
+
+    def _sccs(self, states):
+        def successors(state):
+            return [x for x in self.follow[state] if x in states]
+
+        return _tarjan(sorted(states), successors)
+
+    def _step(self, count):
+        self.steps += count
+        if self.steps > MAX_STEPS:
+            raise TooComplex()
+
+    def _position(self, mask):
+        if not self.case_sensitive:
+            for code, swapped in _LETTERS:
+                if mask >> code & 1:
+                    mask |= 1 << swapped
+        if len(self.masks) >= MAX_POSITIONS:
+            raise TooComplex()
+        self.masks.append(mask)
+        self.follow.append(Counter())
+        position = len(self.masks) - 1
+        return _Fragment([position], [position], 0)
+
+    def _connect(self, sources, targets):
+        for source in sources:
+            for target in targets:
+                self.follow[source][target] += 1
+
+    def _build(self, token):
+        if isinstance(token, (SubpatternToken, InternalSubpatternToken)):
+            return self._sequence(token.childs)
+        if isinstance(token, BranchToken):
+            first, last, nullable = [], [], 0
+            for child in token.childs:
+                fragment = self._build(child)
+                first.extend(fragment.first)
+                last.extend(fragment.last)
+                nullable = min(nullable + fragment.nullable, 2)
+            return _Fragment(first, last, nullable)
+        if isinstance(token, (MinRepeatToken, MaxRepeatToken)):
+            return self._repeat(token)
+        if isinstance(token, GroupRefToken):
+            return self._build(token.group.root)
+        if isinstance(token, AtToken):
+            if token.token[1] in (sre_parse.AT_END, sre_parse.AT_END_STRING):
+                # Nothing can follow the end of the string
+                return self._position(0)
+            return _Fragment([], [], 1)
+        mask = _char_mask(token)
+        if mask is None:
+            # Empty token, asserts and so on
+            return _Fragment([], [], 1)
+        return self._position(mask)
+
+    def _sequence(self, tokens):
+        result = _Fragment([], [], 1)
+        for token in tokens:
+            result = self._concat(result, self._build(token))
+        return result
+
+    def _concat(self, left, right):
+        self._connect(left.last, right.first)
+        # Positions reachable in several ways through the empty matches are repeated, so are the connections
+        first = _at_most_twice(left.first + right.first * left.nullable)
+        last = _at_most_twice(right.last + left.last * right.nullable)
+        return _Fragment(first, last, min(left.nullable * right.nullable, 2))
+
+    def _repeat(self, token):
+        if token.max == 0:
+            return _Fragment([], [], 1)
+        unbounded = token.max > MAX_BOUNDED_REPEAT
+        required = min(token.min, MAX_BOUNDED_REPEAT)
+        optional = 0 if unbounded else token.max - required
+
+        result = _Fragment([], [], 1)
+        # The last required copy of an unbounded repeat is the loop itself, e.g. "a{2,}" is "aa+"
+        for _ in range(required - 1 if unbounded and required else required):
+            result = self._concat(result, self._sequence(token.childs))
+        if unbounded:
+            body = self._sequence(token.childs)
+            self._connect(body.last, body.first)
+            result = self._concat(result, _Fragment(body.first, body.last, body.nullable or int(not required)))
+        for _ in range(optional):
+            body = self._sequence(token.childs)
+            result = self._concat(result, _Fragment(body.first, body.last, min(body.nullable + 1, 2)))
+        return result
+
+
+def _at_most_twice(positions):
+    seen = Counter()
+    result = []
+    for position in positions:
+        if seen[position] < 2:
+            seen[position] += 1
+            result.append(position)
+    return result
+
+
+def _char_mask(token):
+    """
+    Returns mask of the chars matched by the token, None for the tokens that do not match any char.
+    """
+    if isinstance(token, AnyToken):
+        return ANY_CHAR & ~NEWLINE
+    if isinstance(token, LiteralToken):
+        return _code_mask(ord(token.char))
+    if isinstance(token, NotLiteralToken):
+        return ANY_CHAR & ~_code_mask(ord(token.char)) | OTHER_CHARS
+    if isinstance(token, RangeToken):
+        mask = token.can_contain_mask(skip_literal=False)
+        return mask | OTHER_CHARS if token.right_code >= 128 else mask
+    if isinstance(token, CategoryToken):
+        mask = token.can_contain_mask(skip_literal=False)
+        return mask | OTHER_CHARS if token.token[1] in _OTHER_CATEGORIES else mask
+    if isinstance(token, InToken):
+        mask = 0
+        for child in token.childs:
+            if not isinstance(child, NegateToken):
+                mask |= _char_mask(child) or 0
+        if token.childs and isinstance(token.childs[0], NegateToken):
+            return ANY_CHAR & ~mask | OTHER_CHARS
+        return mask
+    return None
+
+
+def _code_mask(code):
+    return 1 << code if code < 128 else OTHER_CHARS
+
+
+def _tarjan(nodes, successors):
+    """
+    Returns strongly connected components of the graph, iterative version of the Tarjan's algorithm.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    result = []
+    counter = 0
+    for node in nodes:
+        if node in index:
+            continue
+        work = [(node, iter(successors(node)))]
+        index[node] = lowlink[node] = counter
+        counter += 1
+        stack.append(node)
+        on_stack.add(node)
+        while work:
+            current, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                elif child in on_stack:
+                    lowlink[current] = min(lowlink[current], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[current])
+                if lowlink[current] == index[current]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == current:
+                            break
+                    result.append(component)
+    return result
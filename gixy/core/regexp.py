@@ -2,6 +2,7 @@ import six
 import logging
 import re
 import random
+import functools
 import itertools
 
 try:
@@ -53,6 +54,44 @@ CATEGORIES_NAMES = {
     sre_parse.CATEGORY_NOT_WORD: r"\W",
 }
 
+# Characters analysis results are precomputed as bitmasks of the ASCII characters,
+# tri-state results (True/False/None) as a pair of masks (true_mask, none_mask).
+ASCII_CHARS = [six.unichr(c) for c in range(128)]
+ALL_MASK = (1 << 128) - 1
+NONE_MASKS = (0, ALL_MASK)
+FALSE_MASKS = (0, 0)
+
+
+def _chars_mask(chars):
+    mask = 0
+    for char in chars:
+        if len(char) == 1 and ord(char) < 128:
+            mask |= 1 << ord(char)
+    return mask
+
+
+def _first_decided(masks, default):
+    """
+    Combines tri-state masks, for every char the first result that is not None wins.
+    """
+    true_mask, none_mask = default
+    for child_true, child_none in reversed(masks):
+        true_mask = child_true | (child_none & true_mask)
+        none_mask = child_none & none_mask
+    return true_mask, none_mask
+
+
+def _tri_state(masks, char):
+    bit = 1 << ord(char)
+    if masks[0] & bit:
+        return True
+    if masks[1] & bit:
+        return None
+    return False
+
+
+ANY_MASK = _chars_mask(CATEGORIES["ANY"])
+
 
 def extract_groups(parsed, top=True):
     result = {}
@@ -80,39 +119,73 @@ def extract_groups(parsed, top=True):
     return result
 
 
-def _gen_combinator(variants, _merge=True):
-    if not hasattr(variants, "__iter__"):
-        return [variants] if variants is not None else []
-
-    res = []
+def _gen_combinator(variants, context):
+    """
+    Lazily yields unique concatenations of the variants, e.g. ["a", ["b", "c"]] -> "ab", "ac".
+    List variants hold the alternatives, values with the dangerous char are yielded first.
+    """
+    factors = []
     need_product = False
     for var in variants:
         if isinstance(var, list):
-            sol = _gen_combinator(var, _merge=False)
-            res.append(sol)
+            factors.append(_gen_alternatives(var, context))
             need_product = True
         elif var is not None:
-            res.append(var)
-
-    if need_product:
-        producted = itertools.product(*res)
-        if _merge:
-            # TODO(buglloc): ??!
-            return list(six.moves.map(_merge_variants, producted))
-        return producted
-    elif _merge:
-        return list(six.moves.map(_merge_variants, [res]))
-    return res
-
-
-def _merge_variants(variants):
+            factors.append(var)
+
+    if not need_product:
+        yield "".join(factors)
+        return
+
+    # Strings are iterated by chars, as the itertools.product does
+    factors = [list(x) if isinstance(x, six.string_types) else x for x in factors]
+    seen = set()
+    for combination in _prioritized_product(factors, context.char):
+        value = "".join(combination)
+        if value not in seen:
+            seen.add(value)
+            yield value
+
+
+def _gen_alternatives(variants, context):
+    if any(isinstance(x, list) for x in variants):
+        return _limit_values(_gen_combinator(variants, context), context)
+
+    values = [x for x in variants if x is not None]
+    return _limit_values(
+        [x for x in values if context.char in x] + [x for x in values if context.char not in x],
+        context
+    )
+
+
+def _prioritized_product(factors, char):
+    """
+    Yields the Cartesian product of the factors, combinations with the char go first:
+    the ones with the char in the first factor, then in the second one and so on.
+    """
+    interesting = [[x for x in factor if char in x] for factor in factors]
+    plain = [[x for x in factor if char not in x] for factor in factors]
+    for i in six.moves.range(len(factors)):
+        for combination in itertools.product(*(plain[:i] + [interesting[i]] + factors[i + 1:])):
+            yield combination
+
+    for combination in itertools.product(*plain):
+        yield combination
+
+
+def _limit_values(values, context):
+    """
+    Returns unique values in the same order, at most context.limit of them.
+    """
     result = []
-    for var in variants:
-        if isinstance(var, tuple):
-            result.append(_merge_variants(var))
-        else:
-            result.append(var)
-    return "".join(result)
+    seen = set()
+    for value in values:
+        if context.limit is not None and len(result) >= context.limit:
+            break
+        if value not in seen:
+            seen.add(value)
+            result.append(value)
+    return result
 
 
 class Token(object):
@@ -152,6 +225,18 @@ class Token(object):
     def must_startswith(self, char, strict=False):
         return self.must_contain(char)
 
+    def can_contain_mask(self, skip_literal=True):
+        raise NotImplementedError("can_contain_mask must be implemented")
+
+    def must_contain_mask(self):
+        raise NotImplementedError("must_contain_mask must be implemented")
+
+    def can_startswith_mask(self, strict=False):
+        return self.can_contain_mask(skip_literal=False), 0
+
+    def must_startswith_mask(self, strict=False):
+        return self.must_contain_mask(), 0
+
     def generate(self, context):
         raise NotImplementedError("generate must be implemented")
 
@@ -169,6 +254,12 @@ class AnyToken(Token):
         # Char may not be present in ANY token
         return False
 
+    def can_contain_mask(self, skip_literal=True):
+        return ANY_MASK
+
+    def must_contain_mask(self):
+        return 0
+
     def generate(self, context):
         if context.char in CATEGORIES["ANY"]:
             return context.char
@@ -192,6 +283,14 @@ class LiteralToken(Token):
     def must_contain(self, char, skip_literal=True):
         return self.char == char
 
+    def can_contain_mask(self, skip_literal=True):
+        if skip_literal:
+            return 0
+        return _chars_mask(self.char)
+
+    def must_contain_mask(self):
+        return _chars_mask(self.char)
+
     def generate(self, context):
         return self.char
 
@@ -213,6 +312,12 @@ class NotLiteralToken(Token):
         # Any char MAY not be present in NotLiteral, e.g.: "a" not present in "[^b]"
         return False
 
+    def can_contain_mask(self, skip_literal=True):
+        return ALL_MASK & ~_chars_mask(self.char)
+
+    def must_contain_mask(self):
+        return 0
+
     def generate(self, context):
         if self.can_contain(context.char):
             return context.char
@@ -238,6 +343,14 @@ class RangeToken(Token):
     def must_contain(self, char, skip_literal=True):
         return self.left == char == self.right
 
+    def can_contain_mask(self, skip_literal=True):
+        return _chars_mask(ASCII_CHARS[max(self.left_code, 0):max(min(self.right_code + 1, 128), 0)])
+
+    def must_contain_mask(self):
+        if self.left == self.right:
+            return _chars_mask(self.left)
+        return 0
+
     def generate(self, context):
         if self.can_contain(context.char):
             return context.char
@@ -260,6 +373,12 @@ class CategoryToken(Token):
     def must_contain(self, char, skip_literal=True):
         return frozenset([char]) == self.char_list
 
+    def can_contain_mask(self, skip_literal=True):
+        return _chars_mask(self.char_list)
+
+    def must_contain_mask(self):
+        return _chars_mask(c for c in self.char_list if frozenset([c]) == self.char_list)
+
     def generate(self, context):
         if self.can_contain(context.char):
             return context.char
@@ -317,6 +436,33 @@ class MinRepeatToken(Token):
             return None
         return self.childs[0].must_startswith(char, strict=strict)
 
+    def can_contain_mask(self, skip_literal=True):
+        if self.max == 0:
+            return 0
+        mask = 0
+        for child in self.childs:
+            mask |= child.can_contain_mask(skip_literal=skip_literal)
+        return mask
+
+    def must_contain_mask(self):
+        if self.max == 0 or self.min == 0:
+            return 0
+        mask = 0
+        for child in self.childs:
+            mask |= child.must_contain_mask()
+        return mask
+
+    def can_startswith_mask(self, strict=False):
+        true_mask, none_mask = self.childs[0].can_startswith_mask(strict)
+        if self.max == 0:
+            return 0, ALL_MASK & ~true_mask
+        return true_mask, none_mask
+
+    def must_startswith_mask(self, strict=False):
+        if self.min == 0 or self.max == 0:
+            return NONE_MASKS
+        return self.childs[0].must_startswith_mask(strict=strict)
+
     def generate(self, context):
         res = []
         if self.min == 0:
@@ -329,11 +475,8 @@ class MinRepeatToken(Token):
         for child in self.childs:
             res.extend(child.generate(context))
 
-        result = []
         repeat = self.max if self.max <= context.max_repeat else context.max_repeat
-        for val in _gen_combinator([res]):
-            result.append(val * repeat)
-        return result
+        return _limit_values((val * repeat for val in _gen_alternatives(res, context)), context)
 
     def __str__(self):
         childs = "".join(str(x) for x in self.childs)
@@ -396,6 +539,33 @@ class MaxRepeatToken(Token):
             return None
         return self.childs[0].must_startswith(char, strict=strict)
 
+    def can_contain_mask(self, skip_literal=True):
+        if self.max == 0:
+            return 0
+        mask = 0
+        for child in self.childs:
+            mask |= child.can_contain_mask(skip_literal=skip_literal)
+        return mask
+
+    def must_contain_mask(self):
+        if self.max == 0 or self.min == 0:
+            return 0
+        mask = 0
+        for child in self.childs:
+            mask |= child.must_contain_mask()
+        return mask
+
+    def can_startswith_mask(self, strict=False):
+        true_mask, none_mask = self.childs[0].can_startswith_mask(strict)
+        if self.max == 0:
+            return 0, ALL_MASK & ~true_mask
+        return true_mask, none_mask
+
+    def must_startswith_mask(self, strict=False):
+        if self.min == 0 or self.max == 0:
+            return NONE_MASKS
+        return self.childs[0].must_startswith_mask(strict=strict)
+
     def generate(self, context):
         res = []
         if self.min == 0:
@@ -408,11 +578,8 @@ class MaxRepeatToken(Token):
         for child in self.childs:
             res.extend(child.generate(context))
 
-        result = []
         repeat = self.max if self.max <= context.max_repeat else context.max_repeat
-        for val in _gen_combinator([res]):
-            result.append(val * repeat)
-        return result
+        return _limit_values((val * repeat for val in _gen_alternatives(res, context)), context)
 
     def __str__(self):
         childs = "".join(str(x) for x in self.childs)
@@ -463,12 +630,36 @@ class BranchToken(Token):
     def must_startswith(self, char, strict=False):
         return all(x.must_startswith(char, strict) for x in self.childs)
 
+    def can_contain_mask(self, skip_literal=True):
+        mask = 0
+        for child in self.childs:
+            mask |= child.can_contain_mask(skip_literal=skip_literal)
+        return mask
+
+    def must_contain_mask(self):
+        mask = ALL_MASK
+        for child in self.childs:
+            mask &= child.must_contain_mask()
+        return mask
+
+    def can_startswith_mask(self, strict=False):
+        mask = 0
+        for child in self.childs:
+            mask |= child.can_startswith_mask(strict)[0]
+        return mask, 0
+
+    def must_startswith_mask(self, strict=False):
+        mask = ALL_MASK
+        for child in self.childs:
+            mask &= child.must_startswith_mask(strict)[0]
+        return mask, 0
+
     def generate(self, context):
         res = []
         for child in self.childs:
             values = child.generate(context)
             if isinstance(values, list):
-                res.extend(child.generate(context))
+                res.extend(values)
             else:
                 res.append(values)
 
@@ -544,12 +735,27 @@ class SubpatternToken(Token):
             return must
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return _subpattern_can_contain_mask(self, skip_literal)
+
+    def must_contain_mask(self):
+        return _subpattern_must_contain_mask(self)
+
+    def can_startswith_mask(self, strict=False):
+        return _subpattern_can_startswith_mask(self, strict)
+
+    def must_startswith_mask(self, strict=False):
+        return _subpattern_must_startswith_mask(self, strict)
+
     def generate(self, context):
+        return _limit_values(self.iter_generate(context), context)
+
+    def iter_generate(self, context):
         res = []
         for child in self.childs:
             res.append(child.generate(context))
 
-        return _gen_combinator(res)
+        return _gen_combinator(res, context)
 
     def __str__(self):
         childs = "".join(str(x) for x in self.childs)
@@ -558,6 +764,38 @@ class SubpatternToken(Token):
         return "({childs})".format(childs=childs)
 
 
+def _subpattern_can_contain_mask(token, skip_literal):
+    mask = 0
+    for child in token.childs:
+        mask |= child.can_contain_mask(skip_literal=skip_literal)
+    return mask
+
+
+def _subpattern_must_contain_mask(token):
+    mask = 0
+    for child in token.childs:
+        mask |= child.must_contain_mask()
+    return mask
+
+
+def _subpattern_can_startswith_mask(token, strict):
+    # See SubpatternToken.can_startswith
+    if isinstance(token.childs[0], AtToken):
+        return _first_decided([child.can_startswith_mask(strict) for child in token.childs[1:]], FALSE_MASKS)
+    elif not strict and not isinstance(token.childs[0], (SubpatternToken, InternalSubpatternToken)):
+        return ANY_MASK, 0
+    return _first_decided([child.can_startswith_mask(strict) for child in token.childs], NONE_MASKS)
+
+
+def _subpattern_must_startswith_mask(token, strict):
+    # See SubpatternToken.must_startswith
+    if isinstance(token.childs[0], AtToken):
+        return _first_decided([child.must_startswith_mask(strict=True) for child in token.childs[1:]], FALSE_MASKS)
+    elif not strict and not isinstance(token.childs[0], (SubpatternToken, InternalSubpatternToken)):
+        return FALSE_MASKS
+    return _first_decided([child.must_startswith_mask(strict=strict) for child in token.childs], NONE_MASKS)
+
+
 class InternalSubpatternToken(Token):
     type = sre_parse.SUBPATTERN
 
@@ -621,12 +859,27 @@ class InternalSubpatternToken(Token):
             return must
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return _subpattern_can_contain_mask(self, skip_literal)
+
+    def must_contain_mask(self):
+        return _subpattern_must_contain_mask(self)
+
+    def can_startswith_mask(self, strict=False):
+        return _subpattern_can_startswith_mask(self, strict)
+
+    def must_startswith_mask(self, strict=False):
+        return _subpattern_must_startswith_mask(self, strict)
+
     def generate(self, context):
+        return _limit_values(self.iter_generate(context), context)
+
+    def iter_generate(self, context):
         res = []
         for child in self.childs:
             res.append(child.generate(context))
 
-        return _gen_combinator(res)
+        return _gen_combinator(res, context)
 
     def __str__(self):
         return "".join(str(x) for x in self.childs)
@@ -661,6 +914,20 @@ class InToken(Token):
         # Any character MAY not be present in IN
         return False
 
+    def can_contain_mask(self, skip_literal=True):
+        # Mirrors can_contain: the loop stops on the first matched child, "negative" is set by NEGATE before it
+        matched = 0
+        negative = 0
+        for child in self.childs:
+            if isinstance(child, NegateToken):
+                negative |= ALL_MASK & ~matched
+            else:
+                matched |= child.can_contain_mask(skip_literal=False)
+        return (matched & ~negative) | (ALL_MASK & ~matched & negative)
+
+    def must_contain_mask(self):
+        return 0
+
     def _generate_positive(self, context):
         result = []
         for child in self.childs:
@@ -720,6 +987,12 @@ class AtToken(Token):
     def must_contain(self, char):
         return False
 
+    def can_contain_mask(self, skip_literal=True):
+        return 0
+
+    def must_contain_mask(self):
+        return 0
+
     def generate(self, context):
         if context.anchored:
             if self.begin:
@@ -751,6 +1024,18 @@ class NegateToken(Token):
     def must_startswith(self, char, strict=False):
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return 0
+
+    def must_contain_mask(self):
+        return 0
+
+    def can_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
+    def must_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
     def generate(self, context):
         return None
 
@@ -777,8 +1062,20 @@ class GroupRefToken(Token):
     def must_startswith(self, char, strict=False):
         return self.group.must_startswith(char, strict=strict)
 
+    def can_contain_mask(self, skip_literal=True):
+        return _chars_mask(c for c in ASCII_CHARS if self.group.can_contain(c, skip_literal=skip_literal))
+
+    def must_contain_mask(self):
+        return _chars_mask(c for c in ASCII_CHARS if self.group.must_contain(c))
+
+    def can_startswith_mask(self, strict=False):
+        return _chars_mask(c for c in ASCII_CHARS if self.group.can_startswith(c, strict=strict)), 0
+
+    def must_startswith_mask(self, strict=False):
+        return _chars_mask(c for c in ASCII_CHARS if self.group.must_startswith(c, strict=strict)), 0
+
     def generate(self, context):
-        return self.group.generate(context)
+        return self.group.root.generate(context)
 
     def __str__(self):
         return "\\\\{0}".format(self.id)
@@ -801,6 +1098,18 @@ class AssertToken(Token):
     def must_startswith(self, char, strict=False):
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return 0
+
+    def must_contain_mask(self):
+        return 0
+
+    def can_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
+    def must_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
 
 class AssertNotToken(Token):
     type = sre_parse.ASSERT_NOT
@@ -819,6 +1128,18 @@ class AssertNotToken(Token):
     def must_startswith(self, char, strict=False):
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return 0
+
+    def must_contain_mask(self):
+        return 0
+
+    def can_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
+    def must_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
 
 class EmptyToken(Token):
     type = None
@@ -836,6 +1157,18 @@ class EmptyToken(Token):
     def must_startswith(self, char, strict=False):
         return None
 
+    def can_contain_mask(self, skip_literal=True):
+        return 0
+
+    def must_contain_mask(self):
+        return 0
+
+    def can_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
+    def must_startswith_mask(self, strict=False):
+        return NONE_MASKS
+
     def generate(self, context):
         return ""
 
@@ -885,11 +1218,12 @@ def parse(sre_obj, parent=None, regexp=None):
 
 
 class GenerationContext(object):
-    def __init__(self, char, max_repeat=5, strict=False, anchored=True):
+    def __init__(self, char, max_repeat=5, strict=False, anchored=True, limit=None):
         self.char = char
         self.max_repeat = max_repeat
         self.strict = strict
         self.anchored = anchored
+        self.limit = limit
 
 
 class Regexp(object):
@@ -910,6 +1244,7 @@ class Regexp(object):
         self._root = _root
         self._parsed = _parsed
         self._groups = {}
+        self._masks = {}
 
     def can_startswith(self, char):
         """
@@ -924,9 +1259,11 @@ class Regexp(object):
         :return bool: True if regex can starts with the specified char, False otherwise.
         """
 
-        return self.root.can_startswith(
-            char=char if self.case_sensitive else char.lower(), strict=self.strict
-        )
+        char = char if self.case_sensitive else char.lower()
+        masks = self._get_masks("can_startswith_mask", self.strict)
+        if masks is not None and len(char) == 1 and char < "\x80":
+            return _tri_state(masks, char)
+        return self.root.can_startswith(char=char, strict=self.strict)
 
     def can_contain(self, char, skip_literal=True):
         """
@@ -943,10 +1280,11 @@ class Regexp(object):
         :return bool: True if regex can contain the specified char, False otherwise.
         """
 
-        return self.root.can_contain(
-            char=char if self.case_sensitive else char.lower(),
-            skip_literal=skip_literal,
-        )
+        char = char if self.case_sensitive else char.lower()
+        mask = self._get_masks("can_contain_mask", skip_literal)
+        if mask is not None and len(char) == 1 and char < "\x80":
+            return bool(mask >> ord(char) & 1)
+        return self.root.can_contain(char=char, skip_literal=skip_literal)
 
     def must_startswith(self, char):
         """
@@ -961,9 +1299,11 @@ class Regexp(object):
         :return bool: True if regex must starts with the specified char, False otherwise.
         """
 
-        return self.root.must_startswith(
-            char=char if self.case_sensitive else char.lower(), strict=self.strict
-        )
+        char = char if self.case_sensitive else char.lower()
+        masks = self._get_masks("must_startswith_mask", self.strict)
+        if masks is not None and len(char) == 1 and char < "\x80":
+            return _tri_state(masks, char)
+        return self.root.must_startswith(char=char, strict=self.strict)
 
     def must_contain(self, char):
         """
@@ -976,13 +1316,35 @@ class Regexp(object):
         :return bool: True if regex MUST contain the specified char, False otherwise.
         """
 
-        return self.root.must_contain(
-            char=char if self.case_sensitive else char.lower()
-        )
+        char = char if self.case_sensitive else char.lower()
+        mask = self._get_masks("must_contain_mask")
+        if mask is not None and len(char) == 1 and char < "\x80":
+            return bool(mask >> ord(char) & 1)
+        return self.root.must_contain(char=char)
+
+    def _get_masks(self, method, *args):
+        """
+        Returns the bitmask of the ASCII chars for the analysis method of the root token, computed once.
+        None means the masks are unavailable and the token tree must be walked for every char.
+        """
+        key = (method,) + args
+        try:
+            return self._masks[key]
+        except KeyError:
+            pass
 
-    def generate(self, char, anchored=False, max_repeat=5):
+        try:
+            masks = getattr(self.root, method)(*args)
+        except Exception as e:
+            # The tree walk raises the same error for the affected chars only
+            LOG.debug("Failed to compute %s of regex %s: %s", method, self.source, e)
+            masks = None
+        self._masks[key] = masks
+        return masks
+
+    def generate(self, char, anchored=False, max_repeat=5, limit=None):
         """
-        Generate values that match regex.
+        Generate unique values that match regex, the ones containing the char first.
         Example:
           Regexp('.a?').generate('s') -> ['s', 'sa']
           Regexp('(?:^http|https)://.').generate('s') -> ['http://s', 'https://s']
@@ -992,11 +1354,12 @@ class Regexp(object):
         :param str char: "dangerous" character, generator try to place it wherever possible.
         :param bool anchored: place anchors in generated values.
         :param int max_repeat: maximum count of repeated group (e.g. "a+" provides "aaaaa").
+        :param int limit: maximum count of generated values, None for no limit.
         :return list of str: True if regex can contain the specified char, False otherwise.
         """
 
-        context = GenerationContext(char, anchored=anchored, max_repeat=max_repeat)
-        for val in self.root.generate(context=context):
+        context = GenerationContext(char, anchored=anchored, max_repeat=max_repeat, limit=limit)
+        for val in itertools.islice(self.root.iter_generate(context=context), limit):
             if anchored and self.strict and not val.startswith("^"):
                 yield "^" + val
             else:
@@ -1012,7 +1375,7 @@ class Regexp(object):
 
         if name in self.groups:
             return self.groups[name]
-        return Regexp("")
+        return get_regexp("")
 
     def reg_group(self, gid, token):
         self._groups[gid] = token
@@ -1074,3 +1437,32 @@ class Regexp(object):
 
         extension_pattern = re.compile(r"\\\.[A-Za-z0-9]+$")
         return bool(extension_pattern.search(self.source))
+
+
+REGEXP_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=REGEXP_CACHE_SIZE)
+def _intern_regexp(source, strict, case_sensitive):
+    return Regexp(source, strict=strict, case_sensitive=case_sensitive)
+
+
+def get_regexp(source, strict=False, case_sensitive=True):
+    """
+    Returns shared Regexp object, so the same regex is parsed and analysed once per process.
+    Returned objects are shared between the callers and must not be modified.
+
+    :param str source: regexp, e.g. ^foo$.
+    :param bool strict: anchored or not.
+    :param bool case_sensitive: case sensitive or not.
+    """
+
+    return _intern_regexp(source, bool(strict), bool(case_sensitive))
+
+
+def regexp_cache_info():
+    """
+    Returns hits, misses, maxsize and currsize of the get_regexp cache.
+    """
+
+    return _intern_regexp.cache_info()
@@ -3,12 +3,16 @@ import logging
 from typing import Optional
 
 from gixy.core.regexp import Regexp
-from gixy.core.context import get_context
+from gixy.core.context import get_context, CONTEXTS
 
 LOG = logging.getLogger(__name__)
 # See ngx_http_script_compile in http/ngx_http_script.c
 EXTRACT_RE = re.compile(r"\$([1-9]|[a-z_][a-z0-9_]*|\{[a-z0-9_]+\})", re.IGNORECASE)
 
+compile_script_stats = {'hits': 0, 'misses': 0}
+# Hits are the recursive evaluations saved by the per-variable query cache
+variable_query_stats = {'hits': 0, 'misses': 0}
+
 
 def compile_script(script, ctx=None):
     """
@@ -17,11 +21,24 @@ def compile_script(script, ctx=None):
         compile_script('http://$foo:$bar') ->
             [Variable('http://'), Variable($foo), Variable(':', Variable($bar).
 
+    Results are cached in the current context until its variables are changed.
+
     :param str script: Nginx scrip.
     :return Variable[]: list of variable.
     """
-    depends = []
     context = get_context()
+    key = (str(script), ctx, context.version)
+    depends = context.compiled_scripts.get(key)
+    if depends is None:
+        compile_script_stats['misses'] += 1
+        depends = context.compiled_scripts[key] = _compile_script(script, ctx, context)
+    else:
+        compile_script_stats['hits'] += 1
+    return list(depends)
+
+
+def _compile_script(script, ctx, context):
+    depends = []
     for i, var in enumerate(EXTRACT_RE.split(str(script))):
         if i % 2:
             # Variable
@@ -37,6 +54,135 @@ def compile_script(script, ctx=None):
     return depends
 
 
+_MISSING = object()
+
+
+def _query(variable, query, char):
+    """
+    Evaluates the query of the variable over the dependency graph iteratively, so long "set" chains
+    do not hit the recursion limit.
+
+    The query plan of a variable is either its result or a list of groups of the variables, the result
+    is True if every group has a variable with the True result. Groups are checked in order and
+    the variables are evaluated on demand, so the evaluation stops as soon as the result is known.
+    Results are cached in the variables until the variables of the current context are changed,
+    since map values are resolved within the current context. A cyclic dependency is evaluated as False.
+
+    :param Variable variable: variable to query.
+    :param str query: one of "can_contain", "can_startswith", "must_contain" and "must_startswith".
+    :param str char: character to test.
+    """
+    results = {}
+    # Plans keep the variables alive, so their ids are not reused
+    plans = {}
+    stack = [variable]
+    while stack:
+        var = stack[-1]
+        key = id(var)
+        if key in results:
+            stack.pop()
+            continue
+
+        if key not in plans:
+            cached = var._get_query_result(query, char)
+            if cached is not _MISSING:
+                stack.pop()
+                results[key] = cached
+                continue
+            plans[key] = (var, getattr(var, '_{0}_plan'.format(query))(char))
+
+        plan = plans[key][1]
+        result = _evaluate_plan(plan, results, plans) if isinstance(plan, list) else plan
+        if isinstance(result, Variable):
+            # The dependency must be evaluated first
+            stack.append(result)
+            continue
+
+        stack.pop()
+        results[key] = result
+        var._set_query_result(query, char, result)
+    return results[id(variable)]
+
+
+def _evaluate_plan(groups, results, plans):
+    """
+    Returns result of the plan groups or the first variable which is not evaluated yet.
+    """
+    for group in groups:
+        for dep in group:
+            result = results.get(id(dep), _MISSING)
+            if result is _MISSING:
+                if id(dep) not in plans:
+                    return dep
+                # Cyclic dependency, the variable is being evaluated
+                result = False
+            if result:
+                break
+        else:
+            return False
+    return True
+
+
+def _map_values(variable):
+    """
+    Returns compiled scripts of the map values of the hash block variable.
+    """
+    result = []
+    for var in variable.value:
+        if not isinstance(var, Variable) or not var.provider or var.provider.nginx_name != 'map': # import MapDirective would be better but circular import..
+            continue # break?
+        if var.provider.parent.nginx_name != 'map': # import MapBlock would be better but circular import..
+            continue # break?
+
+        # Doesn't work for 'map $document_uri $v { ~*^[^\r\n]+$ $document_uri; }' but nothing we can do about that.
+        result.append(compile_script(var.provider.dest_val, ctx=var.provider.src_val))
+    return result
+
+
+_UNRESOLVED = object()
+
+
+def _resolve_final_value(variable):
+    """
+    Resolves final values of the variable and its unresolved dependencies in the topological order.
+    """
+    in_progress = set()
+    stack = [variable]
+    while stack:
+        var = stack[-1]
+        if var._final_value is not _UNRESOLVED:
+            stack.pop()
+            continue
+
+        pending = [dep for dep in var.depends or [] if dep._final_value is _UNRESOLVED]
+        if pending and id(var) not in in_progress:
+            in_progress.add(id(var))
+            for dep in pending:
+                if id(dep) in in_progress:
+                    # Cyclic dependency, nothing to substitute
+                    LOG.info("Cyclic dependency of the variable '{0}' on '{1}'.".format(var.name, dep.name))
+                    dep._final_value = dep.value
+            stack.extend(pending)
+            continue
+
+        stack.pop()
+        in_progress.discard(id(var))
+        var._final_value = _substitute(var)
+
+
+def _substitute(var):
+    if not var.depends:
+        return var.value
+
+    parts = []
+    for dep in var.depends:
+        if isinstance(dep._final_value, list):
+            # MapBlock, GeoBlock cannot be resolved
+            return var.value
+        parts.append(str(dep._final_value))
+    return ''.join(parts)
+
+
 class Variable(object):
     def __init__(
         self,
@@ -64,24 +210,27 @@ class Variable(object):
         self.depends = None
         self.boundary = boundary
         self.provider = provider
-        self.final_value = value
         self.ctx = ctx
+        self._query_version = None
+        self._query_cache = None
+        self._final_value = _UNRESOLVED
         if isinstance(value, Regexp):
             self.regexp = value
         elif have_script:
-            self.depends = compile_script(value, ctx) # XXX: Do we want to append new_depends below?
-            for iteration in range(10): # 10 is arbitrary, just avoid infinite loop (is it possible?)
-                new_depends = compile_script(self.final_value, ctx)
-                if len(new_depends) == 0:
-                    break
-                if type(new_depends[0].value) is list: # MapBlock, GeoBlock cannot be infinitely resolved
-                    self.final_value = self.value
-                    break
-                if len(new_depends) == 1 and self.final_value == new_depends[0].value:
-                    break
-                self.depends = new_depends
-                all_vars = [str(i.value) for i in new_depends]
-                self.final_value = ''.join(all_vars)
+            self.depends = compile_script(value, ctx)
+
+    @property
+    def final_value(self):
+        """
+        Returns the variable value with the dependencies substituted by their final values,
+        e.g. "http://$host/" for "set $a http://$b/; set $b $host;".
+        The value is kept as is if it depends on a map or geo variable.
+
+        Values are resolved on the first access, each variable of the dependency graph is resolved once.
+        """
+        if self._final_value is _UNRESOLVED:
+            _resolve_final_value(self)
+        return self._final_value
 
     def can_contain(self, char):
         """
@@ -90,7 +239,36 @@ class Variable(object):
         :param str char: character to test.
         :return: True if variable can contain the specified char, False otherwise.
         """
+        return _query(self, 'can_contain', char)
+
+    def can_startswith(self, char):
+        """
+        Checks if variable can starts with the specified char.
+
+        :param str char: character to test.
+        :return: True if variable can starts with the specified char, False otherwise.
+        """
+        return _query(self, 'can_startswith', char)
+
+    def must_contain(self, char):
+        """
+        Checks if variable MUST contain the specified char.
+
+        :param str char: character to test.
+        :return: True if variable must contain the specified char, False otherwise.
+        """
+        return _query(self, 'must_contain', char)
 
+    def must_startswith(self, char):
+        """
+        Checks if variable MUST starts with the specified char.
+
+        :param str char: character to test.
+        :return: True if variable must starts with the specified char.
+        """
+        return _query(self, 'must_startswith', char)
+
+    def _can_contain_plan(self, char):
         # First of all check boundary set
         if self.boundary and not self.boundary.can_contain(char):
             return False
@@ -101,32 +279,16 @@ class Variable(object):
 
         # Then dependencies
         if self.depends:
-            return any(dep.can_contain(char) for dep in self.depends)
+            return [self.depends]
 
         # If the value is a list (hash block), check all dest_val values
         if isinstance(self.value, list):
-            for var in self.value:
-                if not isinstance(var, Variable) or not var.provider or var.provider.nginx_name != 'map': # import MapDirective would be better but circular import..
-                    continue # break?
-                if var.provider.parent.nginx_name != 'map': # import MapBlock would be better but circular import..
-                    continue # break?
-
-                compiled_val = compile_script(var.provider.dest_val, ctx=var.provider.src_val) # Doesn't work for 'map $document_uri $v { ~*^[^\r\n]+$ $document_uri; }' but nothing we can do about that.
-                for dep in compiled_val:
-                    if dep.can_contain(char):
-                        return True
+            return [[dep for compiled_val in _map_values(self) for dep in compiled_val]]
 
         # Otherwise user can't control value of this variable
         return False
 
-    def can_startswith(self, char):
-        """
-        Checks if variable can starts with the specified char.
-
-        :param str char: character to test.
-        :return: True if variable can starts with the specified char, False otherwise.
-        """
-
+    def _can_startswith_plan(self, char):
         # First of all check boundary set
         if self.boundary and not self.boundary.can_startswith(char):
             return False
@@ -137,32 +299,16 @@ class Variable(object):
 
         # Then dependencies
         if self.depends:
-            return self.depends[0].can_startswith(char)
+            return [self.depends[:1]]
 
         # If the value is a list (hash block), check all values
         if isinstance(self.value, list):
-            for var in self.value:
-                if not isinstance(var, Variable) or not var.provider or var.provider.nginx_name != 'map':
-                    continue
-                if var.provider.parent.nginx_name != 'map':
-                    continue
-
-                compiled_val = compile_script(var.provider.dest_val, ctx=var.provider.src_val)
-                if compiled_val:
-                    if compiled_val[0].can_startswith(char):
-                        return True
+            return [[compiled_val[0] for compiled_val in _map_values(self) if compiled_val]]
 
         # Otherwise user can't control value of this variable
         return False
 
-    def must_contain(self, char):
-        """
-        Checks if variable MUST contain the specified char.
-
-        :param str char: character to test.
-        :return: True if variable must contain the specified char, False otherwise.
-        """
-
+    def _must_contain_plan(self, char):
         # First of all check boundary set
         if self.boundary and self.boundary.must_contain(char):
             return True
@@ -173,39 +319,16 @@ class Variable(object):
 
         # Then dependencies
         if self.depends:
-            return any(dep.must_contain(char) for dep in self.depends)
+            return [self.depends]
 
-        # If the value is a list (hash block), check all values
+        # If the value is a list (hash block), every map value must contain the char
         if isinstance(self.value, list):
-            # Ensure that every map value must contain the char
-            for var in self.value:
-                if not isinstance(var, Variable) or not var.provider or var.provider.nginx_name != 'map':
-                    continue
-                if var.provider.parent.nginx_name != 'map':
-                    continue
-
-                compiled_val = compile_script(var.provider.dest_val, ctx=var.provider.src_val)
-                found_must_contain = False
-                for dep in compiled_val:
-                    if dep.must_contain(char):
-                        found_must_contain = True
-                        break
-                if not found_must_contain: # A map value doesn't need to contain the char, therefore return False
-                    return False
-
-            return True
+            return _map_values(self)
 
         # Otherwise checks literal
         return self.value and char in self.value
 
-    def must_startswith(self, char):
-        """
-        Checks if variable MUST starts with the specified char.
-
-        :param str char: character to test.
-        :return: True if variable must starts with the specified char.
-        """
-
+    def _must_startswith_plan(self, char):
         # First of all check boundary set
         if self.boundary and self.boundary.must_startswith(char):
             return True
@@ -216,25 +339,35 @@ class Variable(object):
 
         # Then dependencies
         if self.depends:
-            return self.depends[0].must_startswith(char)
+            return [self.depends[:1]]
 
-        # If the value is a list (hash block), check all values
+        # If the value is a list (hash block), every map value must start with the char
         if isinstance(self.value, list):
-            for var in self.value:
-                if not isinstance(var, Variable) or not var.provider or var.provider.nginx_name != 'map':
-                    continue
-                if var.provider.parent.nginx_name != 'map':
-                    continue
-
-                compiled_val = compile_script(var.provider.dest_val, ctx=var.provider.src_val)
-                if not compiled_val or not compiled_val[0].must_startswith(char):
-                    return False
-
-            return True
+            return [compiled_val[:1] for compiled_val in _map_values(self)]
 
         # Otherwise checks literal
         return self.value and self.value[0] == char
 
+    def _get_query_result(self, query, char):
+        if not CONTEXTS:
+            return _MISSING
+
+        version = CONTEXTS[-1].version
+        if self._query_version != version:
+            self._query_version = version
+            self._query_cache = {}
+
+        result = self._query_cache.get((query, char), _MISSING)
+        if result is not _MISSING:
+            variable_query_stats['hits'] += 1
+        return result
+
+    def _set_query_result(self, query, char, result):
+        if not CONTEXTS:
+            return
+        variable_query_stats['misses'] += 1
+        self._query_cache[(query, char)] = result
+
     @property
     def providers(self):
         """
@@ -243,9 +376,11 @@ class Variable(object):
         :return Directive[]: providers.
         """
         result = []
-        if self.provider:
-            result.append(self.provider)
-        if self.depends:
-            for dep in self.depends:
-                result += dep.providers
+        stack = [self]
+        while stack:
+            var = stack.pop()
+            if var.provider:
+                result.append(var.provider)
+            if var.depends:
+                stack.extend(reversed(var.depends))
         return result
@@ -5,7 +5,7 @@ except ImportError:
 
 from gixy.directives.directive import Directive, MapDirective
 from gixy.core.variable import Variable, compile_script
-from gixy.core.regexp import Regexp
+from gixy.core.regexp import get_regexp
 
 
 def get_overrides():
@@ -22,6 +22,13 @@ def get_overrides():
 
 
 class Block(Directive):
+    """
+    Block directive.
+
+    Children must be added with append: lookups by name are answered from the indexes built on the first lookup,
+    append drops the indexes of the block and its parents.
+    """
+
     nginx_name = None
     is_block = True
     self_context = True
@@ -29,51 +36,129 @@ class Block(Directive):
     def __init__(self, name, args):
         super(Block, self).__init__(name, args)
         self.children = []
+        self._indexes = {}
 
     def some(self, name, flat=True):
         """Find first directive with given name"""
-        for child in self.children:
-            if child.name == name:
-                return child
-            if flat and child.is_block and not child.self_context:
-                result = child.some(name, flat=flat)
-                if result:
-                    return result
-        return None
+        if flat:
+            return self._index("some").get(name)
+        result = self._index("children").get(name)
+        return result[0] if result else None
 
     def find(self, name, flat=False):
         """Find all directives with given name"""
-        result = []
-        for child in self.children:
-            if child.name == name:
-                result.append(child)
-            if flat and child.is_block and not child.self_context:
-                result += child.find(name) # XXX: Is it deliberate to set flat=False?
-        return result
+        return list(self._index("find" if flat else "children").get(name, ()))
 
     def find_recursive(self, name):
-        result = []
-        for child in self.children:
-            if child.name == name:
-                result.append(child)
-            if child.is_block:
-                result += child.find_recursive(name)
-        return result
+        return list(self._index("recursive").get(name, ()))
 
     def append(self, directive):
         directive.set_parent(self)
         self.children.append(directive)
+        block = self
+        while block is not None and block._indexes:
+            block._indexes.clear()
+            block = block.parent
+
+    def _index(self, kind):
+        index = self._indexes.get(kind)
+        if index is None:
+            index = self._indexes[kind] = getattr(self, "_build_{0}_index".format(kind))()
+        return index
+
+    def _build_children_index(self):
+        index = {}
+        for child in self.children:
+            index.setdefault(child.name, []).append(child)
+        return index
+
+    def _build_find_index(self):
+        # XXX: Only direct children of the nested blocks, is it deliberate?
+        index = {}
+        for child in self.children:
+            index.setdefault(child.name, []).append(child)
+            if child.is_block and not child.self_context:
+                for name, directives in child._index("children").items():
+                    index.setdefault(name, []).extend(directives)
+        return index
+
+    def _build_some_index(self):
+        index = {}
+        for child in self.children:
+            index.setdefault(child.name, child)
+            if child.is_block and not child.self_context:
+                for name, directive in child._index("some").items():
+                    index.setdefault(name, directive)
+        return index
+
+    def _build_recursive_index(self):
+        index = {}
+        for child in self.children:
+            index.setdefault(child.name, []).append(child)
+            if child.is_block:
+                for name, directives in child._index("recursive").items():
+                    index.setdefault(name, []).extend(directives)
+        return index
 
     def __str__(self):
         return "{name} {args} {{".format(name=self.name, args=" ".join(self.args))
 
 
+# Directives declaring shared memory zones and the parameter with the zone name
+ZONE_DIRECTIVES = {
+    "limit_req_zone": "zone=",
+    "limit_conn_zone": "zone=",
+    "proxy_cache_path": "keys_zone=",
+    "fastcgi_cache_path": "keys_zone=",
+    "uwsgi_cache_path": "keys_zone=",
+    "scgi_cache_path": "keys_zone=",
+}
+
+
 class Root(Block):
     nginx_name = None
 
     def __init__(self):
         super(Root, self).__init__(None, [])
 
+    def get_symbols(self, kind, name):
+        """
+        Find directives declaring the symbol anywhere in the configuration.
+
+        :param str kind: "upstream" for upstreams by name, "server_name" for servers by name,
+                         "variable" for maps and geos by the output variable, "zone" for shared memory zones by name.
+        :param str name: symbol name.
+        :return Directive[]: declaring directives in the configuration order.
+        """
+        return list(self._index("symbols").get((kind, name), ()))
+
+    def _build_symbols_index(self):
+        index = {}
+        for upstream in self.find_recursive("upstream"):
+            if upstream.is_block and upstream.args:
+                index.setdefault(("upstream", upstream.args[0]), []).append(upstream)
+
+        for server in self.find_recursive("server"):
+            if not server.is_block:
+                # "server" directive of upstream
+                continue
+            for server_name in server.find("server_name", flat=True):
+                for name in server_name.args:
+                    index.setdefault(("server_name", name), []).append(server)
+
+        for block in self.find_recursive("map") + self.find_recursive("geo"):
+            if block.is_block:
+                index.setdefault(("variable", block.variable), []).append(block)
+
+        for name, prefix in ZONE_DIRECTIVES.items():
+            for directive in self.find_recursive(name):
+                for arg in directive.args:
+                    if arg.startswith(prefix):
+                        zone = arg[len(prefix):].split(":", 1)[0]
+                        index.setdefault(("zone", zone), []).append(directive)
+                        break
+        return index
+
 
 class HttpBlock(Block):
     nginx_name = "http"
@@ -123,7 +208,7 @@ class LocationBlock(Block):
         if not self.is_regex:
             return []
 
-        regexp = Regexp(self.path, case_sensitive=self.modifier == "~")
+        regexp = get_regexp(self.path, case_sensitive=self.modifier == "~")
         result = []
         for name, group in regexp.groups.items():
             result.append(
@@ -142,7 +227,7 @@ class LocationBlock(Block):
             bool: True if the regex ends with a file extension pattern and is unanchored, False otherwise.
         """
 
-        regexp = Regexp(self.path, case_sensitive=self.modifier == "~")
+        regexp = get_regexp(self.path, case_sensitive=self.modifier == "~")
         return regexp.needs_tail_anchor()
 
 
@@ -183,7 +268,7 @@ class IfBlock(Block):
         if len(compiled_script) == 1:
             boundary = compiled_script[0].regexp
 
-        regexp = Regexp(self.value, case_sensitive=self.operand in ["~", '!~'])
+        regexp = get_regexp(self.value, case_sensitive=self.operand in ["~", '!~'])
         result = []
         for name, group in regexp.groups.items():
             result.append(
@@ -1,7 +1,7 @@
 """This module contains all the classes for directives"""
 
 from gixy.core.variable import Variable
-from gixy.core.regexp import Regexp
+from gixy.core.regexp import Regexp, get_regexp
 
 import ipaddress
 
@@ -30,6 +30,9 @@ class Directive:
         self.name = name
         self.parent = None
         self.args = args
+        # Set by the parser: configuration file and line of the directive
+        self.filename = None
+        self.line = None
         self._raw = raw
 
     def set_parent(self, parent):
@@ -79,6 +82,15 @@ class Directive:
         if scope:
             yield from scope.find_recursive(name)
 
+    def find_symbols(self, kind, name):
+        """Find directives declaring the symbol in the whole configuration, see Root.get_symbols"""
+        scope = self.parent
+        while scope and scope.parent:
+            scope = scope.parent
+
+        get_symbols = getattr(scope, "get_symbols", None)
+        return get_symbols(kind, name) if get_symbols else []
+
     def find_single_directive_in_scope(self, name):
         """Find a single directive in the current scope"""
         for parent in self.parents:
@@ -220,7 +232,7 @@ class RewriteDirective(Directive):
 
     @property
     def variables(self):
-        regexp = Regexp(self.pattern, case_sensitive=True)
+        regexp = get_regexp(self.pattern, case_sensitive=True)
         result = []
         for name, group in regexp.groups.items():
             result.append(
@@ -343,7 +355,7 @@ class MapDirective(Directive):
             else:
                 pattern = self.src_val[1:]
                 cs = True
-            self.regex = Regexp(pattern, case_sensitive=cs)
+            self.regex = get_regexp(pattern, case_sensitive=cs)
 
     def __str__(self):
         map_str = self.src_val
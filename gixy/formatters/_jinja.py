@@ -1,10 +1,12 @@
 from __future__ import absolute_import
-from jinja2 import Environment, PackageLoader
 
 from gixy.utils.text import to_text
 
 
 def load_template(name):
+    # Imported here, so jinja2 is not loaded for the other formatters
+    from jinja2 import Environment, PackageLoader
+
     env = Environment(loader=PackageLoader('gixy', 'formatters/templates'), trim_blocks=True, lstrip_blocks=True)
     env.filters['to_text'] = to_text_filter
     return env.get_template(name)
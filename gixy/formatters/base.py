@@ -7,6 +7,8 @@ from gixy.directives.block import MapBlock, GeoBlock
 
 class BaseFormatter(object):
     skip_parents = {block.Root, block.HttpBlock}
+    # Streaming formatters write the reports to their output as soon as they are fed and the rest of it on flush
+    streaming = False
 
     def __init__(self):
         self.reports = {}
@@ -16,24 +18,37 @@ class BaseFormatter(object):
         raise NotImplementedError("Formatter must override format_reports function")
 
     def feed(self, path, manager):
-        for severity in gixy.severity.ALL:
-            self.stats[severity] += manager.stats[severity]
-
-        self.reports[path] = []
+        self.feed_reports(path, self.prepare_reports(manager), manager.stats)
+
+    def prepare_reports(self, manager):
+        """
+        Returns reports of the manager results as a list of plain dicts, so they can be passed between processes.
+        The config snippets are omitted if the omit_config option is set.
+        """
+        reports = []
+        with_config = not manager.config.omit_config
         for result in manager.results:
             report = self._prepare_result(manager.root,
+                                          with_config=with_config,
                                           summary=result.summary,
                                           severity=result.severity,
                                           description=result.description,
                                           issues=result.issues,
                                           plugin=result.name,
                                           help_url=result.help_url)
-            self.reports[path].extend(report)
+            reports.extend(report)
+        return reports
+
+    def feed_reports(self, path, reports, stats):
+        for severity in gixy.severity.ALL:
+            self.stats[severity] += stats[severity]
+
+        self.reports[path] = reports
 
     def flush(self):
         return self.format_reports(self.reports, self.stats)
 
-    def _prepare_result(self, root, issues, severity, summary, description, plugin, help_url):
+    def _prepare_result(self, root, issues, severity, summary, description, plugin, help_url, with_config=True):
         result = {}
         for issue in issues:
             report = dict(
@@ -60,29 +75,49 @@ class BaseFormatter(object):
                 result[key] = report
 
         for report in result.values():
-            if report['directives']:
-                config = self._resolve_config(root, report['directives'])
-            else:
-                config = ''
-
-            del report['directives']
-            report['config'] = config
+            directives = report.pop('directives')
+            report['locations'] = self._resolve_locations(directives)
+            if with_config:
+                report['config'] = self._resolve_config(root, directives) if directives else ''
             yield report
 
-    def _resolve_config(self, root, directives):
-        points = set()
+    def _resolve_locations(self, directives):
+        """
+        Returns unique (filename, line) pairs of the directives, filename is None for the audited content itself.
+        """
+        locations = []
+        seen = set()
         for directive in directives:
-            points.add(directive)
-            points.update(p for p in directive.parents)
+            location = (directive.filename, directive.line)
+            if directive.line is not None and location not in seen:
+                seen.add(location)
+                locations.append(location)
+        return locations
 
-        result = self._traverse_tree(root, points, 0)
+    def _resolve_config(self, root, directives):
+        # Involved children of the blocks, only these paths of the tree are printed
+        involved = {}
+        for directive in directives:
+            child = directive
+            for parent in directive.parents:
+                siblings = involved.setdefault(parent, set())
+                if child in siblings:
+                    break
+                siblings.add(child)
+                child = parent
+
+        result = self._traverse_tree(root, involved, 0)
         return '\n'.join(result)
 
-    def _traverse_tree(self, tree, points, level):
+    def _traverse_tree(self, tree, involved, level):
         result = []
-        for leap in tree.children:
-            if leap not in points:
-                continue
+        children = involved.get(tree)
+        if not children:
+            return result
+        if len(children) > 1:
+            children = [child for child in tree.children if child in children]
+
+        for leap in children:
             printable = type(leap) not in self.skip_parents
             # Special hack for includes
             # TODO(buglloc): fix me
@@ -95,7 +130,7 @@ class BaseFormatter(object):
                 result.append('{indent:s}{dir:s}'.format(indent='\t' * level, dir=directive))
 
             if leap.is_block:
-                result.extend(self._traverse_tree(leap, points, level + 1 if printable else level))
+                result.extend(self._traverse_tree(leap, involved, level + 1 if printable else level))
                 if printable and have_parentheses:
                     result.append('{indent:s}}}'.format(indent='\t' * level))
 
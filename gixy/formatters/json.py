@@ -5,20 +5,29 @@ import json
 from gixy.formatters.base import BaseFormatter
 
 
+def report_to_dict(path, issue):
+    """
+    Returns JSON representation of the issue report, the config is omitted if it is not rendered.
+    """
+    result = dict(
+        path=path,
+        plugin=issue['plugin'],
+        summary=issue['summary'],
+        severity=issue['severity'],
+        description=issue['description'],
+        reference=issue['help_url'],
+        reason=issue['reason'],
+    )
+    if 'config' in issue:
+        result['config'] = issue['config']
+    return result
+
+
 class JsonFormatter(BaseFormatter):
     def format_reports(self, reports, stats):
         result = []
         for path, issues in reports.items():
             for issue in issues:
-                result.append(dict(
-                    path=path,
-                    plugin=issue['plugin'],
-                    summary=issue['summary'],
-                    severity=issue['severity'],
-                    description=issue['description'],
-                    reference=issue['help_url'],
-                    reason=issue['reason'],
-                    config=issue['config']
-                ))
+                result.append(report_to_dict(path, issue))
 
         return json.dumps(result, sort_keys=True, indent=2, separators=(',', ': '))
@@ -0,0 +1,33 @@
+from __future__ import absolute_import
+
+import sys
+import json
+
+import gixy
+from gixy.formatters.base import BaseFormatter
+from gixy.formatters.json import report_to_dict
+
+
+class JsonlFormatter(BaseFormatter):
+    """
+    Writes JSON Lines, one issue per line, as soon as the reports of a file are fed.
+    Reports are not kept, so the memory usage does not depend on the number of files.
+    """
+
+    streaming = True
+
+    def __init__(self):
+        super(JsonlFormatter, self).__init__()
+        self.output = sys.stdout
+
+    def feed_reports(self, path, reports, stats):
+        for severity in gixy.severity.ALL:
+            self.stats[severity] += stats[severity]
+
+        for issue in reports:
+            self.output.write(json.dumps(report_to_dict(path, issue), sort_keys=True))
+            self.output.write('\n')
+        self.output.flush()
+
+    def format_reports(self, reports, stats):
+        return ''
@@ -0,0 +1,119 @@
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import pathlib
+from urllib.parse import quote
+
+import gixy
+from gixy.formatters.base import BaseFormatter
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+INFORMATION_URI = "https://github.com/dvershinin/gixy"
+
+LEVELS = {
+    gixy.severity.UNSPECIFIED: "note",
+    gixy.severity.LOW: "note",
+    gixy.severity.MEDIUM: "warning",
+    gixy.severity.HIGH: "error",
+}
+
+
+def artifact_uri(path):
+    """
+    Returns URI of the configuration file, relative to the working directory if the file is inside it.
+    """
+    if os.path.isabs(path):
+        relative = os.path.relpath(path)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return pathlib.Path(path).absolute().as_uri()
+        path = relative
+    return quote(path.replace(os.sep, "/"))
+
+
+class SarifFormatter(BaseFormatter):
+    """
+    Writes SARIF log, plugins are the rules and issues are the results.
+
+    Results are written as soon as the reports of a file are fed, so the reports are not kept.
+    The rules are written on flush after the results, once per plugin.
+    """
+
+    streaming = True
+
+    def __init__(self):
+        super(SarifFormatter, self).__init__()
+        self.output = sys.stdout
+        self.rules = []
+        self.rule_indexes = {}
+        self.results_count = 0
+
+    def feed_reports(self, path, reports, stats):
+        for severity in gixy.severity.ALL:
+            self.stats[severity] += stats[severity]
+
+        for issue in reports:
+            self.output.write(",\n" if self.results_count else self._header())
+            self.output.write(json.dumps(self._result(path, issue), sort_keys=True))
+            self.results_count += 1
+        self.output.flush()
+
+    def format_reports(self, reports, stats):
+        if not self.results_count:
+            self.output.write(self._header())
+
+        tool = {
+            "driver": {
+                "name": "gixy",
+                "version": gixy.version,
+                "informationUri": INFORMATION_URI,
+                "rules": self.rules,
+            }
+        }
+        self.output.write("\n], \"tool\": {0}}}]}}\n".format(json.dumps(tool, sort_keys=True)))
+        self.output.flush()
+        return ''
+
+    def _header(self):
+        # The run is opened with the results, the tool with the rules is written after them
+        return '{{"$schema": {0}, "version": {1}, "runs": [{{"results": [\n'.format(
+            json.dumps(SARIF_SCHEMA), json.dumps(SARIF_VERSION))
+
+    def _rule_index(self, issue):
+        plugin = issue["plugin"]
+        if plugin not in self.rule_indexes:
+            rule = {
+                "id": plugin,
+                "name": plugin,
+                "shortDescription": {"text": issue["summary"]},
+                "defaultConfiguration": {"level": LEVELS.get(issue["severity"], "warning")},
+            }
+            if issue["description"]:
+                rule["fullDescription"] = {"text": issue["description"]}
+            if issue["help_url"]:
+                rule["helpUri"] = issue["help_url"]
+            self.rule_indexes[plugin] = len(self.rules)
+            self.rules.append(rule)
+        return self.rule_indexes[plugin]
+
+    def _result(self, path, issue):
+        locations = []
+        for filename, line in issue.get("locations") or [(None, None)]:
+            location = {"artifactLocation": {"uri": artifact_uri(filename or path)}}
+            if line:
+                location["region"] = {"startLine": line}
+            locations.append({"physicalLocation": location})
+
+        message = issue["summary"]
+        if issue["reason"]:
+            message = "{0} {1}".format(message, issue["reason"])
+
+        return {
+            "ruleId": issue["plugin"],
+            "ruleIndex": self._rule_index(issue),
+            "level": LEVELS.get(issue["severity"], "warning"),
+            "message": {"text": message},
+            "locations": locations,
+        }
@@ -0,0 +1,228 @@
+import os
+import glob
+import hashlib
+import logging
+
+import six
+from pyparsing import ParseException
+
+import gixy
+from gixy.utils.files import load_json, store_json
+from gixy.parser.raw_parser import GRAMMAR_VERSION
+from gixy.parser.fast_parser import Node
+
+LOG = logging.getLogger(__name__)
+
+# Must be increased on every change of the stored tree format, invalidates the stored trees
+CACHE_FORMAT_VERSION = 1
+
+
+def dump_tree(parsed):
+    """
+    Returns JSON serializable representation of the raw parse tree.
+
+    Each statement is stored as [name, line, col, tokens], children of the blocks are stored the same way.
+    """
+    return [_dump_statement(statement) for statement in parsed]
+
+
+def load_tree(data):
+    """
+    Restores the raw parse tree dumped with dump_tree.
+    """
+    return Node([_load_statement(statement) for statement in data])
+
+
+def _dump_statement(statement):
+    name = statement.getName()
+    if name == 'block':
+        tokens = [statement[0], list(statement[1]), dump_tree(statement[2])]
+    else:
+        tokens = statement.asList()
+    return [name, statement.get('line'), statement.get('col'), tokens]
+
+
+def _load_statement(data):
+    name, line, col, tokens = data
+    if name == 'block':
+        tokens = [tokens[0], tokens[1], load_tree(tokens[2])]
+    return Node(tokens, name, line, col)
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size
+
+
+_worker_parsers = {}
+
+
+def _parse_file_job(args):
+    """
+    Parses the file in a worker process, returns the memo key and the dumped tree
+    """
+    parser_cls, cache_dir, path = args
+    if parser_cls not in _worker_parsers:
+        _worker_parsers[parser_cls] = parser_cls()
+
+    cache = ParseCache(cache_dir=cache_dir)
+    try:
+        key = cache.file_key(_worker_parsers[parser_cls], path)
+        tree = cache.parse_file(_worker_parsers[parser_cls], path)
+    except (ParseException, IOError, OSError):
+        # Will be reported by the parser in the main process
+        return None
+    return key, dump_tree(tree), cache.hits, cache.misses
+
+
+class ParseCache(object):
+    """
+    Cache of the raw parse trees.
+
+    Within a run, trees of the files are kept in memory by the parser, path, mtime and size, so a file included
+    many times is read and parsed once. Expansions of the include patterns are kept as well.
+
+    If cache_dir is set, trees are also stored there between runs. The key is a hash of the file content,
+    gixy version, grammar version, cache format version and the parser, so changed files are parsed again
+    and the parser engines do not share the trees.
+
+    If jobs is greater than 1, parse_files parses the files in that many worker processes.
+    """
+
+    def __init__(self, cache_dir=None, jobs=1):
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.hits = 0
+        self.misses = 0
+        self._files = {}
+        self._globs = {}
+        self._executor = None
+
+    def file_key(self, parser, path):
+        return (type(parser).__name__,) + _file_stat(path)
+
+    def parse_file(self, parser, path):
+        """
+        Returns the raw parse tree of the file, parsed once per run unless the file is changed.
+        """
+        key = self.file_key(parser, path)
+        if key not in self._files:
+            with open(path) as f:
+                content = f.read()
+            self._files[key] = self.parse(parser, content)
+        return self._files[key]
+
+    def parse_files(self, parser, paths):
+        """
+        Returns raw parse trees of the files in the same order, None for the files that failed.
+        Files that are not parsed yet are parsed in the worker processes with the parser class.
+        """
+        keys = []
+        jobs = []
+        for path in paths:
+            try:
+                key = self.file_key(parser, path)
+            except (IOError, OSError):
+                key = None
+            keys.append(key)
+            if key is not None and key not in self._files:
+                jobs.append((type(parser), self.cache_dir, path))
+
+        if len(jobs) > 1 and self.jobs > 1:
+            for result in self._get_executor().map(_parse_file_job, jobs):
+                if result is None:
+                    continue
+                key, data, hits, misses = result
+                self._files[key] = load_tree(data)
+                self.hits += hits
+                self.misses += misses
+        else:
+            for _, _, path in jobs:
+                try:
+                    self.parse_file(parser, path)
+                except (ParseException, IOError, OSError):
+                    pass
+
+        return [self._files.get(key) for key in keys]
+
+    def refresh(self):
+        """
+        Forgets the trees of the changed or removed files and the include pattern expansions,
+        so a long-running process sees the changes made since the previous run.
+        """
+        for key in list(self._files):
+            try:
+                current = _file_stat(key[1])
+            except (IOError, OSError):
+                current = None
+            if current != key[1:]:
+                del self._files[key]
+        self._globs = {}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        return self._executor
+
+    def glob(self, cwd, pattern):
+        """
+        Returns paths matching the include pattern relative to the cwd.
+        """
+        key = (cwd, pattern)
+        if key not in self._globs:
+            self._globs[key] = list(glob.iglob(os.path.join(cwd, pattern)))
+        return self._globs[key]
+
+    def parse(self, parser, content):
+        """
+        Returns the raw parse tree of the content, loaded from the cache or parsed with the raw parser.
+        """
+        if not self.cache_dir:
+            return parser.parse(content)
+
+        key = self._key(parser, content)
+        tree = self._load(key)
+        if tree is not None:
+            self.hits += 1
+            return tree
+
+        self.misses += 1
+        tree = parser.parse(content)
+        self._store(key, tree)
+        return tree
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _key(self, parser, content):
+        digest = hashlib.sha256()
+        digest.update('{0}:{1}:{2}:{3}:'.format(
+            gixy.version, GRAMMAR_VERSION, CACHE_FORMAT_VERSION, type(parser).__name__).encode('ascii'))
+        if isinstance(content, six.binary_type):
+            digest.update(b'b:' + content)
+        else:
+            digest.update(b's:' + content.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _load(self, key):
+        data = load_json(self._path(key))
+        if data is None:
+            return None
+        try:
+            return load_tree(data)
+        except (ValueError, TypeError, IndexError):
+            LOG.debug('Ignore corrupted parse cache entry: %s', self._path(key))
+            return None
+
+    def _store(self, key, tree):
+        store_json(self._path(key), dump_tree(tree))
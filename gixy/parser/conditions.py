@@ -0,0 +1,85 @@
+"""
+Parsing of the "if" condition bodies and values, shared by the raw parser engines.
+"""
+
+import re
+
+WHITESPACE = ' \t\r\n'
+
+WHITESPACE_RE = re.compile(r'[ \t\r\n]*')
+VARIABLE_RE = re.compile(r'[$_\-A-Za-z0-9]+')
+VALUE_WQ_RE = re.compile(r'(?:\([^\s;]*\)|\$\{\w+\}|\\[(){};\s]|[^\s;{}])+')
+VALUE_DQ_RE = re.compile(r'"(?:[^"\\]|(?:\\.))*"', re.MULTILINE | re.DOTALL)
+VALUE_SQ_RE = re.compile(r"'(?:[^'\\]|(?:\\.))*'", re.MULTILINE | re.DOTALL)
+ESCAPED_QUOTE_RE = re.compile(r'\\(\'|")')
+IF_MODIFIER_RE = re.compile(r'!?(?:(?:=|~\*|~)(?![A-Za-z0-9_$])|-[fdex])')
+
+WS_ESCAPES = ((r'\t', '\t'), (r'\n', '\n'), (r'\f', '\f'), (r'\r', '\r'))
+
+
+def unquote(token):
+    """
+    Returns value of the quoted token, escaped whitespaces and quotes are replaced like pyparsing QuotedString does.
+    """
+    value = token[1:-1]
+    if '\\' in value:
+        for escaped, char in WS_ESCAPES:
+            value = value.replace(escaped, char)
+        value = ESCAPED_QUOTE_RE.sub(r'\g<1>', value)
+    return value
+
+
+def skip_whitespace(text, pos, end):
+    return WHITESPACE_RE.match(text, pos, end).end()
+
+
+def parse_value(text, pos, end):
+    """
+    Parses the quoted or unquoted value at the pos of the text.
+
+    :return: (value, end of the value) tuple or None if there is no value.
+    """
+    if pos >= end:
+        return None
+
+    char = text[pos]
+    if char == '"' or char == "'":
+        match = (VALUE_DQ_RE if char == '"' else VALUE_SQ_RE).match(text, pos, end)
+        if match:
+            return unquote(match.group()), match.end()
+
+    match = VALUE_WQ_RE.match(text, pos, end)
+    if match:
+        return match.group(), match.end()
+    return None
+
+
+def parse_condition(text, start, end):
+    """
+    Parses the body of an "if" condition located between start and end offsets of the text.
+
+    Follows the grammar:
+        (if_modifier + Optional(space) + value) | (variable + Optional(space + if_modifier + Optional(space) + value))
+
+    :return: list of the condition tokens or None if the condition is not parsable.
+    """
+    pos = skip_whitespace(text, start, end)
+
+    modifier = IF_MODIFIER_RE.match(text, pos, end)
+    if modifier:
+        parsed = parse_value(text, skip_whitespace(text, modifier.end(), end), end)
+        if parsed:
+            return [modifier.group(), parsed[0]]
+
+    variable = VARIABLE_RE.match(text, pos, end)
+    if not variable:
+        return None
+    cur = variable.end()
+    if cur < end and text[cur] in WHITESPACE:
+        cur = skip_whitespace(text, cur, end)
+        modifier = IF_MODIFIER_RE.match(text, cur, end)
+        if modifier:
+            parsed = parse_value(text, skip_whitespace(text, modifier.end(), end), end)
+            if parsed:
+                return [variable.group(), modifier.group(), parsed[0]]
+    return [variable.group()]
@@ -0,0 +1,362 @@
+"""
+Hand-written nginx configuration tokenizer.
+
+It scans the configuration once, from left to right, and produces the same tree as the pyparsing
+grammar in :mod:`gixy.parser.raw_parser` (including its quirks), but without backtracking through
+every statement alternative. Regular expressions are only used to match single tokens.
+"""
+
+import re
+
+from pyparsing import ParseException
+
+from gixy.parser.raw_parser import decode_content, get_line_index, log_unparsable_block
+from gixy.parser.conditions import WHITESPACE, WHITESPACE_RE, parse_value, parse_condition
+
+# Same character sets as the pyparsing grammar: Word(alphanums + ".+-_/") and Keyword.DEFAULT_KEYWORD_CHARS
+KEYWORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.+-_/')
+IDENT_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+HASH_BLOCKS = frozenset(['map', 'types', 'geo', 'charset'])
+NESTED_STOP_CHARS = frozenset('{}' + WHITESPACE)
+
+KEYWORD_RE = re.compile(r'[A-Za-z0-9.+\-_/]+')
+PATH_RE = re.compile(r'[A-Za-z0-9.\-_/]+')
+COMMENT_RE = re.compile(r'#.*')
+CONDITION_RE = re.compile(r'\((?:[^()\n\r\\]|(?:\(.*\))|(?:\\.))+?\)')
+# Quoted strings inside of unparsed blocks, see pyparsing.quotedString
+NESTED_DQ_RE = re.compile(r'"(?:[^"\n\r\\]|(?:"")|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*')
+NESTED_SQ_RE = re.compile(r"'(?:[^'\n\r\\]|(?:'')|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*")
+
+FILE_DELIMITER = '# configuration file '
+
+
+class Node(list):
+    """
+    Tokens of a single statement.
+
+    Provides the subset of the pyparsing ``ParseResults`` interface used by :class:`NginxParser`.
+    """
+
+    __slots__ = ('name', 'line', 'col')
+
+    def __init__(self, tokens=(), name=None, line=None, col=None):
+        super(Node, self).__init__(tokens)
+        self.name = name
+        self.line = line
+        self.col = col
+
+    def getName(self):
+        return self.name
+
+    def get(self, key, default=None):
+        if key == 'line' and self.line is not None:
+            return self.line
+        if key == 'col' and self.col is not None:
+            return self.col
+        return default
+
+    def asList(self):
+        return _as_list(self)
+
+
+def _as_list(tokens):
+    return [_as_list(t) if isinstance(t, list) else t for t in tokens]
+
+
+class FastRawParser(object):
+    """
+    A class that parses nginx configuration with a single-pass scanner
+    """
+
+    def parse(self, data):
+        """
+        Returns the parsed tree.
+        """
+        content = decode_content(data)
+        if not content:
+            return Node()
+
+        # pyparsing expands tabs before parsing, columns and quoted values depend on it
+        return _Scanner(content.expandtabs()).parse()
+
+
+class _Scanner(object):
+    def __init__(self, text):
+        self.text = text
+        self.size = len(text)
+
+    def parse(self):
+        text, size = self.text, self.size
+        result = Node()
+        pos = self._skip(0)
+        while pos < size:
+            parsed = self._statement(pos)
+            if not parsed:
+                raise ParseException(text, pos, 'Expected end of text')
+            node, pos = parsed
+            result.append(node)
+            pos = self._skip(pos)
+        return result
+
+    def _node(self, tokens, name, loc):
+        line, col = get_line_index(self.text).position(loc)
+        return Node(tokens, name, line, col)
+
+    def _skip(self, pos, end=None):
+        if end is None:
+            return WHITESPACE_RE.match(self.text, pos).end()
+        return WHITESPACE_RE.match(self.text, pos, end).end()
+
+    def _char(self, pos):
+        return self.text[pos] if pos < self.size else ''
+
+    def _is_keyword(self, pos, word):
+        end = pos + len(word)
+        return self.text.startswith(word, pos) and (end >= self.size or self.text[end] not in IDENT_CHARS)
+
+    def _statement(self, pos):
+        """Parses a single statement starting at pos, returns (node, end) or None."""
+        text = self.text
+        char = text[pos]
+        if char == '#':
+            return self._file_delimiter(pos) or self._comment(pos)
+
+        if char in KEYWORD_CHARS:
+            if char == 'i' and self._is_keyword(pos, 'if'):
+                parsed = self._if_block(pos)
+                if parsed:
+                    return parsed
+            elif char == 'l' and self._is_keyword(pos, 'location'):
+                parsed = self._location_block(pos)
+                if parsed:
+                    return parsed
+
+            match = KEYWORD_RE.match(text, pos)
+            name = match.group()
+            args, end = self._values(match.end())
+            if name in HASH_BLOCKS and args:
+                parsed = self._hash_block(pos, name, args, end)
+                if parsed:
+                    return parsed
+
+            after_args = self._skip(end)
+            brace = self._skip_comment(after_args)
+            if self._char(brace) == '{':
+                children, body_end, ok = self._children(brace + 1)
+                if ok:
+                    return self._node([name, args, children], 'block', pos), body_end + 1
+                return (self._hash_value(pos, 'hash_value') or
+                        self._unparsed_block(pos, name, args, after_args, body_end))
+
+            if self._char(after_args) == ';':
+                if name == 'include' and len(args) == 1:
+                    return self._node([name] + args, 'include', pos), after_args + 1
+                return self._node([name] + args, 'directive', pos), after_args + 1
+
+        return self._hash_value(pos, 'hash_value')
+
+    def _values(self, pos):
+        """ZeroOrMore(space + value)"""
+        text, size = self.text, self.size
+        args = []
+        while pos < size and text[pos] in WHITESPACE:
+            start = self._skip(pos)
+            if start >= size:
+                break
+            parsed = self._value(start)
+            if not parsed:
+                break
+            value, pos = parsed
+            args.append(value)
+        return args, pos
+
+    def _value(self, pos, end=None):
+        return parse_value(self.text, pos, self.size if end is None else end)
+
+    def _skip_comment(self, pos):
+        """Suppress(Optional(comment))"""
+        if self._char(pos) == '#':
+            return self._skip(COMMENT_RE.match(self.text, pos).end())
+        return pos
+
+    def _children(self, pos):
+        """
+        Optional(sub_block) + right_bracket.
+        Returns (children, end, ok) where end is the position of the closing bracket or of the unparsable statement.
+        """
+        size = self.size
+        children = []
+        while True:
+            pos = self._skip(pos)
+            if pos >= size:
+                return children, pos, False
+            if self.text[pos] == '}':
+                return children, pos, True
+            parsed = self._statement(pos)
+            if not parsed:
+                return children, pos, False
+            node, pos = parsed
+            children.append(node)
+
+    def _if_block(self, pos):
+        match = CONDITION_RE.match(self.text, self._skip(pos + 2))
+        if not match:
+            return None
+        condition = parse_condition(self.text, match.start() + 1, match.end() - 1)
+        if condition is None:
+            return None
+
+        brace = self._skip_comment(self._skip(match.end()))
+        if self._char(brace) != '{':
+            return None
+        children, end, ok = self._children(brace + 1)
+        if not ok:
+            return None
+        return self._node(['if', condition, children], 'block', pos), end + 1
+
+    def _location_block(self, pos):
+        args = []
+        cur = pos + len('location')
+        if self._char(cur) in WHITESPACE:
+            start = self._skip(cur)
+            for modifier in ('=', '~*', '~', '^~'):
+                if self._is_keyword(start, modifier):
+                    args.append(modifier)
+                    cur = start + len(modifier)
+                    break
+
+        parsed = self._value(self._skip(cur))
+        if not parsed:
+            return None
+        value, cur = parsed
+        args.append(value)
+
+        brace = self._skip_comment(self._skip(cur))
+        if self._char(brace) != '{':
+            return None
+        children, end, ok = self._children(brace + 1)
+        if not ok:
+            return None
+        return self._node(['location', args, children], 'block', pos), end + 1
+
+    def _hash_block(self, pos, name, args, end):
+        brace = self._skip(end)
+        if self._char(brace) != '{':
+            return None
+
+        children = []
+        cur = brace + 1
+        while True:
+            cur = self._skip(cur)
+            if cur >= self.size:
+                return None
+            if self.text[cur] == '}':
+                return self._node([name, args, children], 'block', pos), cur + 1
+            parsed = self._include(cur) or self._hash_value(cur, 'hash_value')
+            if not parsed:
+                return None
+            node, cur = parsed
+            children.append(node)
+
+    def _include(self, pos):
+        if not self._is_keyword(pos, 'include'):
+            return None
+        cur = pos + len('include')
+        if self._char(cur) not in WHITESPACE:
+            return None
+        parsed = self._value(self._skip(cur))
+        if not parsed:
+            return None
+        value, cur = parsed
+        cur = self._skip(cur)
+        if self._char(cur) != ';':
+            return None
+        return self._node(['include', value], 'include', pos), cur + 1
+
+    def _hash_value(self, pos, name):
+        """value + Optional(ZeroOrMore(space) + value) + semicolon"""
+        parsed = self._value(pos)
+        if not parsed:
+            return None
+        value, cur = parsed
+        tokens = [value]
+
+        parsed = self._value(self._skip(cur))
+        if parsed:
+            value, cur = parsed
+            tokens.append(value)
+
+        cur = self._skip(cur)
+        if self._char(cur) != ';':
+            return None
+        return self._node(tokens, name, pos), cur + 1
+
+    def _file_delimiter(self, pos):
+        if not self.text.startswith(FILE_DELIMITER, pos):
+            return None
+        match = PATH_RE.match(self.text, self._skip(pos + len(FILE_DELIMITER)))
+        if not match:
+            return None
+        end = self._skip(match.end())
+        if self._char(end) != ':':
+            return None
+        return self._node([match.group()], 'file_delimiter', pos), end + 1
+
+    def _comment(self, pos):
+        match = COMMENT_RE.match(self.text, pos)
+        return self._node([match.group()[1:].strip()], 'comment', pos), match.end()
+
+    def _unparsed_block(self, pos, name, args, brace, error_pos):
+        """keyword + Group(ZeroOrMore(space + value)) + nestedExpr("{", "}")"""
+        if self._char(brace) != '{':
+            return None
+        parsed = self._nested(brace)
+        if not parsed:
+            return None
+        nested, end = parsed
+
+        log_unparsable_block(self.text, pos, error_pos)
+        return self._node([name, args, nested], 'unparsed_block', pos), end
+
+    def _nested(self, pos):
+        text, size = self.text, self.size
+        tokens = []
+        pos += 1
+        while True:
+            pos = self._skip(pos)
+            if pos >= size:
+                return None
+            char = text[pos]
+            if char == '}':
+                return tokens, pos + 1
+            if char == '{':
+                parsed = self._nested(pos)
+                if not parsed:
+                    return None
+                nested, pos = parsed
+                tokens.append(nested)
+                continue
+
+            end = self._nested_quoted(pos)
+            if end:
+                tokens.append(text[pos:end])
+                pos = end
+                continue
+
+            start = pos
+            pos += 1
+            while pos < size and text[pos] not in NESTED_STOP_CHARS:
+                if (text[pos] == '"' or text[pos] == "'") and self._nested_quoted(pos):
+                    break
+                pos += 1
+            tokens.append(text[start:pos])
+
+    def _nested_quoted(self, pos):
+        char = self.text[pos]
+        if char != '"' and char != "'":
+            return None
+        match = (NESTED_DQ_RE if char == '"' else NESTED_SQ_RE).match(self.text, pos)
+        end = match.end()
+        if self._char(end) != char:
+            return None
+        return end + 1
@@ -1,41 +1,64 @@
 import os
-import glob
 import logging
 import fnmatch
 
 from pyparsing import ParseException
 from gixy.core.exceptions import InvalidConfiguration
-from gixy.parser import raw_parser
+from gixy.parser import raw_parser, fast_parser
+from gixy.parser.cache import ParseCache
 from gixy.directives import block, directive
 from gixy.utils.text import to_native
 
 LOG = logging.getLogger(__name__)
 
+PARSER_ENGINES = {
+    "pyparsing": raw_parser.RawParser,
+    "fast": fast_parser.FastRawParser,
+}
+DEFAULT_PARSER_ENGINE = "pyparsing"
+
+_raw_parsers = {}
+
+
+def get_raw_parser(engine=DEFAULT_PARSER_ENGINE):
+    """
+    Returns the raw parser for the engine, parsers are stateless and shared across NginxParser instances
+    """
+    if engine not in PARSER_ENGINES:
+        raise ValueError("Unknown parser engine: {0}".format(engine))
+    if engine not in _raw_parsers:
+        _raw_parsers[engine] = PARSER_ENGINES[engine]()
+    return _raw_parsers[engine]
+
 
 class NginxParser(object):
-    def __init__(self, cwd="", allow_includes=True):
+    def __init__(self, cwd="", allow_includes=True, engine=DEFAULT_PARSER_ENGINE, cache=None):
         self.cwd = cwd
         self.configs = {}
         self.is_dump = False
         self.allow_includes = allow_includes
         self.directives = {}
-        self.parser = raw_parser.RawParser()
+        self.parser = get_raw_parser(engine)
+        self.cache = cache or ParseCache()
         self._init_directives()
         self._path_stack = None
 
     def parse_file(self, path, root=None):
         LOG.debug("Parse file: {0}".format(path))
-        content = open(path).read()
-        return self.parse(content=content, root=root, path_info=path)
+        return self._parse(self.cache.parse_file, path, root=root, path_info=path)
 
     def parse(self, content, root=None, path_info=None):
+        return self._parse(self.cache.parse, content, root=root, path_info=path_info)
+
+    def _parse(self, parse_raw, source, root=None, path_info=None):
         if path_info is not None:
             self._path_stack = path_info
 
-        if not root:
+        is_root = not root
+        if is_root:
             root = block.Root()
         try:
-            parsed = self.parser.parse(content)
+            parsed = parse_raw(self.parser, source)
         except ParseException as e:
             error_msg = "char {char} (line:{line}, col:{col})".format(
                 char=e.loc, line=e.lineno, col=e.col
@@ -57,6 +80,8 @@ class NginxParser(object):
             self.is_dump = True
             self.cwd = os.path.dirname(root_filename)
             parsed = self.configs[root_filename]
+        elif is_root and self.allow_includes and self.cache.jobs > 1:
+            self._prefetch_includes(parsed)
 
         self.parse_block(parsed, root)
         self._path_stack = path_info
@@ -99,11 +124,17 @@ class NginxParser(object):
             children = parsed_args[1]
 
             inst = klass(parsed_name, args)
+            self._set_location(inst, parsed_info[parsed_name])
             self.parse_block(children, inst)
             return inst
         else:
             args = [to_native(v).strip() for v in parsed_args]
-            return klass(parsed_name, args)
+            return self._set_location(klass(parsed_name, args), parsed_info[parsed_name])
+
+    def _set_location(self, inst, line):
+        inst.filename = self.path_info
+        inst.line = line
+        return inst
 
     def log_file_warning(self, filename):
         LOG.warning("Included file '%s' not found from '%s'", filename, self.path_info)
@@ -146,7 +177,7 @@ class NginxParser(object):
     def _resolve_file_include(self, pattern, parent):
         path = os.path.join(self.cwd, pattern)
         exists = False
-        for file_path in glob.iglob(path):
+        for file_path in self.cache.glob(self.cwd, pattern):
             if not os.path.exists(file_path):
                 self.log_file_warning(file_path)
                 continue
@@ -157,6 +188,23 @@ class NginxParser(object):
         if not exists:
             self.log_file_warning(path)
 
+    def _prefetch_includes(self, parsed):
+        """
+        Parses all the files of the include graph in parallel, level by level.
+        The directive tree is built later in the original order from the cached raw trees.
+        """
+        seen = set()
+        pending = [parsed]
+        while pending:
+            paths = []
+            for tree in pending:
+                for pattern in _find_includes(tree):
+                    for file_path in self.cache.glob(self.cwd, pattern):
+                        if file_path not in seen:
+                            seen.add(file_path)
+                            paths.append(file_path)
+            pending = [tree for tree in self.cache.parse_files(self.parser, paths) if tree is not None]
+
     def _resolve_dump_include(self, pattern, parent):
         path = os.path.join(self.cwd, pattern)
         found = False
@@ -193,3 +241,13 @@ class NginxParser(object):
     def path_info(self):
         """Current file being parsed, or None."""
         return self._path_stack if self._path_stack else None
+
+
+def _find_includes(parsed_block):
+    for parsed in parsed_block:
+        parsed_type = parsed.getName()
+        if parsed_type == "include":
+            yield parsed[1]
+        elif parsed_type == "block":
+            for pattern in _find_includes(parsed[2]):
+                yield pattern
@@ -1,3 +1,5 @@
+import re
+import bisect
 import logging
 import codecs
 import six
@@ -7,12 +9,17 @@ except ImportError:
     from functools import cached_property
 
 from pyparsing import (
-    Literal, Suppress, White, Word, alphanums, Forward, Group, Optional, Combine,
+    Suppress, White, Word, alphanums, Forward, Group, Optional,
     Keyword, OneOrMore, ZeroOrMore, Regex, QuotedString, nestedExpr, ParseResults,
-    oneOf, lineno, col, ParseException)
+    oneOf, ParseException)
+
+from gixy.parser.conditions import parse_condition
 
 LOG = logging.getLogger(__name__)
 
+# Must be increased on every change of the parse tree produced by the grammar, invalidates cached trees
+GRAMMAR_VERSION = 1
+
 
 class NginxQuotedString(QuotedString):
     def __init__(self, quoteChar):
@@ -24,6 +31,21 @@ class NginxQuotedString(QuotedString):
         self.escCharReplacePattern = '\\\\(\'|")'
 
 
+def decode_content(data):
+    """
+    Returns the stripped configuration text.
+
+    :param data: configuration content, bytes are decoded as UTF-8 if they start with BOM and as latin1 otherwise
+    """
+    if isinstance(data, six.binary_type):
+        if data[:3] == codecs.BOM_UTF8:
+            encoding = 'utf-8-sig'
+        else:
+            encoding = 'latin1'
+        return data.decode(encoding).strip()
+    return data.strip()
+
+
 class RawParser(object):
     """
     A class that parses nginx configuration with pyparsing
@@ -33,15 +55,7 @@ class RawParser(object):
         """
         Returns the parsed tree.
         """
-        if isinstance(data, six.binary_type):
-            if data[:3] == codecs.BOM_UTF8:
-                encoding = 'utf-8-sig'
-            else:
-                encoding = 'latin1'
-            content = data.decode(encoding).strip()
-        else:
-            content = data.strip()
-
+        content = decode_content(data)
         if not content:
             return ParseResults()
 
@@ -56,7 +70,6 @@ class RawParser(object):
         space = White().suppress()
         keyword = Word(alphanums + ".+-_/")
         path = Word(alphanums + ".-_/")
-        variable = Word("$_-" + alphanums)
         value_wq = Regex(r'(?:\([^\s;]*\)|\$\{\w+\}|\\[(){};\s]|[^\s;{}])+')
         known_hash_blocks = oneOf("map types geo charset")
         value_sq = NginxQuotedString(quoteChar="'")
@@ -67,20 +80,18 @@ class RawParser(object):
             Keyword("=") |
             Keyword("~*") | Keyword("~") |
             Keyword("^~"))
-        # modifier for if statement
-        if_modifier = Combine(Optional("!") + (
-            Keyword("=") |
-            Keyword("~*") | Keyword("~") |
-            (Literal("-") + (Literal("f") | Literal("d") | Literal("e") | Literal("x")))))
+
         # This ugly workaround needed to parse unquoted regex with nested parentheses
-        # so we capture all content between parentheses and then parse it :(
-        # TODO(buglloc): may be use something better?
-        condition_body = (
-            (if_modifier + Optional(space) + value) |
-            (variable + Optional(space + if_modifier + Optional(space) + value))
-        )
+        # so we capture all content between parentheses and then parse it in place,
+        # see parse_condition for the grammar
+        def parse_condition_body(s, loc, tokens):
+            body = parse_condition(s, loc + 1, loc + len(tokens[0]) - 1)
+            if body is None:
+                raise ParseException(s, loc, "Invalid condition")
+            return body
+
         condition = Regex(r'\((?:[^()\n\r\\]|(?:\(.*\))|(?:\\.))+?\)')\
-            .setParseAction(lambda s, l, t: condition_body.parseString(t[0][1:-1]))
+            .setParseAction(parse_condition_body)
 
         # rules
         include = (
@@ -118,16 +129,17 @@ class RawParser(object):
         hash_block = Forward()
         unparsed_block = Forward()
 
-        sub_block = OneOrMore(Group(if_block |
-                                    location_block |
-                                    hash_block |
-                                    generic_block |
-                                    include |
-                                    directive |
-                                    file_delimiter |
-                                    comment |
-                                    hash_value |
-                                    unparsed_block))
+        statement = Group(if_block |
+                          location_block |
+                          hash_block |
+                          generic_block |
+                          include |
+                          directive |
+                          file_delimiter |
+                          comment |
+                          hash_value |
+                          unparsed_block)
+        sub_block = OneOrMore(statement)
 
         if_block << (
             Keyword("if") +
@@ -170,9 +182,9 @@ class RawParser(object):
                 right_bracket)
         )("block")
 
+        unparsed_head = keyword + Group(ZeroOrMore(space + value))
         unparsed_block << (
-            keyword +
-            Group(ZeroOrMore(space + value)) +
+            unparsed_head +
             nestedExpr(opener="{", closer="}")
         )("unparsed_block")
 
@@ -184,11 +196,29 @@ class RawParser(object):
         include.setParseAction(attach_line_number)
         file_delimiter.setParseAction(attach_line_number)
         hash_value.setParseAction(attach_line_number)
-        unparsed_block.setParseAction(attach_line_number, detect_problematic_line)
+        unparsed_block.setParseAction(attach_line_number, self._detect_problematic_line)
         comment.setParseAction(attach_line_number, _fix_comment)
 
+        self._statement = statement
+        self._unparsed_head = unparsed_head
         return sub_block
 
+    def _detect_problematic_line(self, s, loc, tokens):
+        """
+        Finds the first statement of an unparsed block that the grammar fails on.
+        Statements are matched in place, starting from the block opening bracket.
+        """
+        pos, _ = self._unparsed_head._parse(s, loc, doActions=False)
+        pos = s.index('{', pos) + 1
+        try:
+            while True:
+                pos, _ = self._statement._parse(s, pos, doActions=False)
+        except ParseException:
+            pass
+
+        log_unparsable_block(s, loc, self._statement.preParse(s, pos))
+        return tokens
+
 
 def _fix_comment(string, location, tokens):
     """
@@ -200,8 +230,50 @@ def _fix_comment(string, location, tokens):
     :return: list of the cleared comment tokens
     """
 
-    comment = tokens[0][1:].strip()
-    return [comment]
+    tokens[0] = tokens[0][1:].strip()
+    return tokens
+
+
+class LineIndex(object):
+    """
+    Newline offsets of a text, resolves locations into line and column numbers by binary search.
+
+    Follows the pyparsing lineno() and col() semantics, which scan the text from the beginning on every call.
+    """
+
+    __slots__ = ('text', '_newlines')
+
+    def __init__(self, text):
+        self.text = text
+        self._newlines = [m.start() for m in re.finditer('\n', text)]
+
+    def lineno(self, loc):
+        return bisect.bisect_left(self._newlines, loc) + 1
+
+    def col(self, loc):
+        idx = bisect.bisect_left(self._newlines, loc)
+        return loc - self._newlines[idx - 1] if idx else loc + 1
+
+    def position(self, loc):
+        """
+        Returns (line, col) tuple of the location
+        """
+        idx = bisect.bisect_left(self._newlines, loc)
+        return idx + 1, (loc - self._newlines[idx - 1] if idx else loc + 1)
+
+
+_line_index = None
+
+
+def get_line_index(text):
+    """
+    Returns LineIndex of the text, the last one is cached since parse actions are called with the same string.
+    """
+    global _line_index
+    if _line_index is None or _line_index.text is not text:
+        _line_index = LineIndex(text)
+    return _line_index
+
 
 def attach_line_number(s, loc, tokens):
     """
@@ -211,48 +283,26 @@ def attach_line_number(s, loc, tokens):
     :param loc: the location where the match started
     :param tokens: the tokens matched
     """
-    tokens['line'] = lineno(loc, s)
-    tokens['col'] = col(loc, s)
+    tokens['line'], tokens['col'] = get_line_index(s).position(loc)
     return tokens
 
-def flatten_tokens(tokens_list):
-    parts = []
-    for tok in tokens_list:
-        if isinstance(tok, list):
-            parts.append('{')
-            parts.append(flatten_tokens(tok))
-            parts.append('}')
-        else:
-            parts.append(str(tok))
-    return ' '.join(parts)
-
-def detect_problematic_line(s, loc, tokens):
-    if len(tokens) < 3:
-        return tokens  # not enough content to reparse
-
-    block_content = flatten_tokens(tokens[2])
-    line_num = lineno(loc, s)
-    # col_num = col(loc, s)
-    try:
-        # Try to reparse the flattened block
-        _ = RawParser().script.parseString(block_content, parseAll=True)
-    except ParseException as e:
-        error_line_num = e.lineno
-        error_col = e.col
-
-        block_lines = block_content.splitlines()
-
-        if 0 < error_line_num <= len(block_lines):
-            broken_line = block_lines[error_line_num - 1]
-            start_pos = error_col
-            snippet = broken_line[start_pos : start_pos + 50].replace("', '", " ") # Replace ', ' due to flattened list(horrible hack)
-
-            LOG.warning(
-                "Detected unparsable content inside block beginning at line %d: '%s'.",
-                line_num, snippet
-            )
-        else:
-            LOG.warning(
-                "Detected unparsable content inside block at unknown position."
-            )
-    return tokens
+
+def log_unparsable_block(s, block_loc, error_loc):
+    """
+    Logs the content of an unparsed block which the grammar fails on.
+
+    :param s: the original text being parsed
+    :param block_loc: the location where the block starts
+    :param error_loc: the location of the first unparsable statement in the block
+    """
+    if error_loc >= len(s) or s[error_loc] == '}':
+        LOG.warning("Detected unparsable content inside block at unknown position.")
+        return
+
+    line_end = s.find('\n', error_loc)
+    if line_end < 0:
+        line_end = len(s)
+    LOG.warning(
+        "Detected unparsable content inside block beginning at line %d: '%s'.",
+        get_line_index(s).lineno(block_loc), s[error_loc:min(error_loc + 50, line_end)]
+    )
@@ -0,0 +1,145 @@
+# Generated by `python -m gixy.core.plugins_manager`, do not edit.
+# Metadata of the plugins, so they are not imported to list them and their options.
+
+DIGEST = 'aa5c00eb3cd22dea57f669d0a2fa8a9e8656a7799e7036b029e816a6cf42ae80'
+
+PLUGINS = {
+    'add_header_content_type': {
+        'module': 'gixy.plugins.add_header_content_type',
+        'severity': 'LOW',
+        'directives': ['add_header'],
+        'options': {},
+    },
+    'add_header_multiline': {
+        'module': 'gixy.plugins.add_header_multiline',
+        'severity': 'LOW',
+        'directives': ['add_header', 'more_set_headers'],
+        'options': {},
+    },
+    'add_header_redefinition': {
+        'module': 'gixy.plugins.add_header_redefinition',
+        'severity': 'LOW',
+        'directives': ['server', 'location', 'if'],
+        'options': {'headers': set()},
+    },
+    'alias_traversal': {
+        'module': 'gixy.plugins.alias_traversal',
+        'severity': 'HIGH',
+        'directives': ['alias'],
+        'options': {},
+    },
+    'allow_without_deny': {
+        'module': 'gixy.plugins.allow_without_deny',
+        'severity': 'HIGH',
+        'directives': ['allow'],
+        'options': {},
+    },
+    'error_log_off': {
+        'module': 'gixy.plugins.error_log_off',
+        'severity': 'MEDIUM',
+        'directives': ['error_log'],
+        'options': {},
+    },
+    'hash_without_default': {
+        'module': 'gixy.plugins.hash_without_default',
+        'severity': 'MEDIUM',
+        'directives': ['map', 'geo'],
+        'options': {},
+    },
+    'host_spoofing': {
+        'module': 'gixy.plugins.host_spoofing',
+        'severity': 'MEDIUM',
+        'directives': ['proxy_set_header'],
+        'options': {},
+    },
+    'http_splitting': {
+        'module': 'gixy.plugins.http_splitting',
+        'severity': 'HIGH',
+        'directives': ['rewrite', 'return', 'add_header', 'proxy_set_header', 'proxy_pass'],
+        'options': {},
+    },
+    'if_is_evil': {
+        'module': 'gixy.plugins.if_is_evil',
+        'severity': 'HIGH',
+        'directives': [],
+        'options': {},
+    },
+    'low_keepalive_requests': {
+        'module': 'gixy.plugins.low_keepalive_requests',
+        'severity': 'LOW',
+        'directives': ['keepalive_requests'],
+        'options': {},
+    },
+    'missing_resolver': {
+        'module': 'gixy.plugins.missing_resolver',
+        'severity': 'LOW',
+        'directives': ['proxy_pass'],
+        'options': {},
+    },
+    'origins': {
+        'module': 'gixy.plugins.origins',
+        'severity': 'UNSPECIFIED',
+        'directives': ['if'],
+        'options': {'domains': ['*'], 'https_only': False, 'lower_hostname': True},
+    },
+    'proxy_pass_normalized': {
+        'module': 'gixy.plugins.proxy_pass_normalized',
+        'severity': 'MEDIUM',
+        'directives': ['proxy_pass'],
+        'options': {},
+    },
+    'regex_redos': {
+        'module': 'gixy.plugins.regex_redos',
+        'severity': 'HIGH',
+        'directives': ['location', 'rewrite', 'if', 'map', 'server_name'],
+        'options': {'batch_size': 50, 'cache_dir': '', 'concurrency': 4, 'url': ''},
+    },
+    'resolver_external': {
+        'module': 'gixy.plugins.resolver_external',
+        'severity': 'HIGH',
+        'directives': ['resolver'],
+        'options': {},
+    },
+    'return_with_allow_deny': {
+        'module': 'gixy.plugins.return_with_allow_deny',
+        'severity': 'MEDIUM',
+        'directives': ['allow', 'deny'],
+        'options': {},
+    },
+    'ssrf': {
+        'module': 'gixy.plugins.ssrf',
+        'severity': 'HIGH',
+        'directives': ['proxy_pass'],
+        'options': {},
+    },
+    'try_files_is_evil_too': {
+        'module': 'gixy.plugins.try_files_is_evil_too',
+        'severity': 'MEDIUM',
+        'directives': ['try_files'],
+        'options': {},
+    },
+    'unanchored_regex': {
+        'module': 'gixy.plugins.unanchored_regex',
+        'severity': 'LOW',
+        'directives': ['location'],
+        'options': {},
+    },
+    'valid_referers': {
+        'module': 'gixy.plugins.valid_referers',
+        'severity': 'HIGH',
+        'directives': ['valid_referers'],
+        'options': {},
+    },
+    'version_disclosure': {
+        'module': 'gixy.plugins.version_disclosure',
+        'severity': 'HIGH',
+        'directives': ['server_tokens'],
+        'options': {},
+    },
+    'worker_rlimit_nofile_vs_connections': {
+        'module': 'gixy.plugins.worker_rlimit_nofile_vs_connections',
+        'severity': 'MEDIUM',
+        'directives': ['worker_connections'],
+        'options': {},
+    },
+}
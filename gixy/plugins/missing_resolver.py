@@ -57,8 +57,8 @@ class missing_resolver(Plugin):
         upstream_directives = []
         found_upstream = False
         found_bad_server = False
-        for upstream in directive.find_imperative_directives_in_scope("upstream", True):
-            if getattr(upstream, "args", None) == [parsed_host]:
+        for upstream in directive.find_symbols("upstream", parsed_host):
+            if upstream.args == [parsed_host]:
                 found_upstream = True
                 for child in upstream.children:
                     if child.name == 'server' and 'resolve' not in child.args:
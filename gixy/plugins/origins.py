@@ -1,11 +1,21 @@
 import re
+import functools
 import gixy
 from gixy.plugins.plugin import Plugin
-from gixy.core.regexp import Regexp
+from gixy.core.regexp import get_regexp
 from urllib.parse import urlparse
-from publicsuffixlist import PublicSuffixList
 
-_PSL = PublicSuffixList()
+# Maximum count of the generated values checked per regex, the ones with the dangerous char are generated first
+MAX_CANDIDATES = 1000
+
+@functools.lru_cache(maxsize=None)
+def get_psl():
+    """
+    Returns the public suffix list shared by the plugins, it is loaded on the first use since loading is slow.
+    """
+    from publicsuffixlist import PublicSuffixList
+    return PublicSuffixList()
+
 
 class origins(Plugin):
     r"""
@@ -50,7 +60,6 @@ class origins(Plugin):
 
     def __init__(self, config):
         super(origins, self).__init__(config)
-        self.psl = _PSL
 
         self.directive_type = None
         self.insecure_set = set()
@@ -89,7 +98,8 @@ class origins(Plugin):
         if i == j:
             return True
 
-        return self.psl.privatesuffix(i.strip('.')) == self.psl.privatesuffix(j.strip('.')) != None
+        psl = get_psl()
+        return psl.privatesuffix(i.strip('.')) == psl.privatesuffix(j.strip('.')) != None
 
     def parse_url(self, url):
         try:
@@ -138,8 +148,8 @@ class origins(Plugin):
         name = self.directive_type.split('_')[1]
         severity = self.severity_insecure_origin if name == 'origin' else self.severity_insecure_referer
 
-        regexp = Regexp(directive.value, case_sensitive=case_sensitive)
-        for candidate_match in regexp.generate('`', anchored=True, max_repeat=5): # Replace matching groups with '`' (which should not be in a real URL as it should be url-encoded).
+        regexp = get_regexp(directive.value, case_sensitive=case_sensitive)
+        for candidate_match in regexp.generate('`', anchored=True, max_repeat=5, limit=MAX_CANDIDATES): # Replace matching groups with '`' (which should not be in a real URL as it should be url-encoded).
 
             # Decode to punycode if needed.
             candidate_match = candidate_match.encode('idna').decode()
@@ -21,6 +21,12 @@ class Plugin(object):
     def audit(self, directive):
         pass
 
+    def post_audit(self):
+        """
+        Called once the whole configuration is audited, e.g. to check the collected directives at once.
+        """
+        pass
+
     @property
     def issues(self):
         return self._issues
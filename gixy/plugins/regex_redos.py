@@ -1,6 +1,13 @@
-import requests
+import os
+import json
+import hashlib
+
 import gixy
 from gixy.plugins.plugin import Plugin
+from gixy.core.regexp import get_regexp
+from gixy.core.redos import analyze
+from gixy.directives.directive import MapDirective
+from gixy.utils.files import load_json, store_json
 
 
 class regex_redos(Plugin):
@@ -17,12 +24,21 @@ class regex_redos(Plugin):
     /aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaab
     can result in catastrophic backtracking.
 
-    This plugin relies on an external, public API to determine vulnerability.
-    Because of this network-dependence, and the fact that potentially private
-    expressions are sent over the network, usage of this plugin requires
-    the --regex-redos-url flag. This flag must specify the full URL to a
+    By default, the expressions are checked by the built-in static analyser,
+    which looks for nested quantifiers and overlapping alternations under a star.
+    The analysis is done locally in milliseconds, but it is less precise than
+    a dedicated ReDoS checker, so only the exponential backtracking is reported.
+    Polynomial backtracking (e.g. adjacent overlapping repeats) and regexes too
+    complex to analyse are reported by the ReDoS check server only.
+
+    Alternatively, the --regex-redos-url flag may specify the full URL to a
     service which can be queried with expressions, responding with a report
     matching the https://github.com/makenowjust-labs/recheck format.
+    Note that potentially private expressions are sent over the network then.
+    The expressions are sent once the whole configuration is audited, in batches
+    of --regex-redos-batch-size expressions over up to --regex-redos-concurrency
+    connections. If --regex-redos-cache-dir is set, the reports are stored there
+    and the expressions are not sent again.
 
     An implementation of a compatible server:
     https://github.com/MegaManSec/recheck-http-api
@@ -40,66 +56,166 @@ class regex_redos(Plugin):
         'resources (also known as ReDoS).'
     )
     help_url = 'https://joshua.hu/regex-redos-recheck-nginx-gixy'
-    directives = ['location']  # XXX: Missing server_name, rewrite, if, map, proxy_redirect
+    directives = ['location', 'rewrite', 'if', 'map', 'server_name']  # XXX: Missing proxy_redirect
     options = {
-        'url': ""
+        'url': "",
+        'cache_dir': "",
+        'concurrency': 4,
+        'batch_size': 50
     }
-    skip_test = True
 
     def __init__(self, config):
         super(regex_redos, self).__init__(config)
         self.redos_server = self.config.get('url')
+        self.cache_dir = self.config.get('cache_dir')
+        self.concurrency = max(int(self.config.get('concurrency') or self.options['concurrency']), 1)
+        self.batch_size = max(int(self.config.get('batch_size') or self.options['batch_size']), 1)
+        # Regexes to be checked by the ReDoS check server, (directive, regex, modifier)
+        self.pending = []
 
     def audit(self, directive):
-        # If we have no ReDoS check URL, skip.
-        if not self.redos_server:
-            return
-
-        # Only process directives that have regex modifiers.
-        if directive.modifier not in ('~', '~*'):
+        for target, regex_pattern, case_sensitive in self._regexes(directive):
+            if self.redos_server:
+                self.pending.append((target, regex_pattern, "" if case_sensitive else "i"))
+            else:
+                recheck = analyze(get_regexp(regex_pattern, case_sensitive=case_sensitive))
+                # Polynomial backtracking is common in ordinary regexes (e.g. "^(.+\.php)(/.+)$"), so the
+                # local analysis reports the exponential one only
+                if (recheck.get("complexity") or {}).get("summary") == "exponential":
+                    self._report(target, regex_pattern, recheck)
+
+    def post_audit(self):
+        if not self.pending:
             return
 
-        regex_pattern = directive.path
-        fail_reason = f'Could not check regex {regex_pattern} for ReDoS.'
-
-        modifier = "" if directive.modifier == "~" else "i"
-        json_data = {"1": {"pattern": regex_pattern, "modifier": modifier}}
+        pending, self.pending = self.pending, []
+        results = self._remote_check(set((pattern, modifier) for _, pattern, modifier in pending))
+        for target, regex_pattern, modifier in pending:
+            self._report(target, regex_pattern, results.get((regex_pattern, modifier)))
+
+    def _regexes(self, directive):
+        """
+        Yields (directive, regex, case sensitivity) tuples of the regexes used by the directive.
+        """
+        if directive.name == 'location':
+            # Only process directives that have regex modifiers.
+            if directive.modifier in ('~', '~*'):
+                yield directive, directive.path, directive.modifier == '~'
+        elif directive.name == 'rewrite':
+            yield directive, directive.pattern, True
+        elif directive.name == 'if':
+            if directive.operand in ('~', '~*', '!~', '!~*'):
+                yield directive, directive.value, directive.operand in ('~', '!~')
+        elif directive.name == 'map':
+            for child in directive.children:
+                if isinstance(child, MapDirective) and child.is_regex:
+                    yield [directive, child], child.regex.source, child.regex.case_sensitive
+        elif directive.name == 'server_name':
+            # Server names are case-insensitive
+            for name in directive.args:
+                if name.startswith('~'):
+                    yield directive, name[1:], False
+
+    def _remote_check(self, keys):
+        """
+        Returns recheck reports of the (regex, modifier) keys, loaded from the cache or requested
+        from the ReDoS check server. Keys that could not be checked are missing.
+        """
+        results = {}
+        missing = []
+        for key in sorted(keys):
+            recheck = self._load(key)
+            if recheck is None:
+                missing.append(key)
+            else:
+                results[key] = recheck
+
+        if not missing:
+            return results
+
+        # The server is optional, so are the HTTP dependencies
+        from concurrent.futures import ThreadPoolExecutor
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_maxsize=self.concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                for batch_results in executor.map(lambda batch: self._post_batch(session, batch), batches):
+                    results.update(batch_results)
+
+        for key in missing:
+            # Unknown status is likely a timeout of the server, so it is checked again next time
+            if key in results and results[key].get("status") != "unknown":
+                self._store(key, results[key])
+        return results
+
+    def _post_batch(self, session, batch):
+        import requests
+
+        json_data = dict(
+            (str(idx), {"pattern": pattern, "modifier": modifier})
+            for idx, (pattern, modifier) in enumerate(batch, 1)
+        )
 
         # Attempt to contact the ReDoS check server.
         try:
-            response = requests.post(
+            response = session.post(
                 self.redos_server,
                 json=json_data,
                 headers={"Content-Type": "application/json"},
                 timeout=60
             )
         except requests.RequestException:
-            self.add_issue(directive=directive, reason=fail_reason, severity=self.unknown_severity)
-            return
+            return {}
 
         # If we get a non-200 response, skip.
         if response.status_code != 200:
-            self.add_issue(directive=directive, reason=fail_reason, severity=self.unknown_severity)
-            return
+            return {}
 
         # Attempt to parse the JSON response.
         try:
             response_json = response.json()
         except ValueError:
-            self.add_issue(directive=directive, reason=fail_reason, severity=self.unknown_severity)
+            return {}
+        if not isinstance(response_json, dict):
+            return {}
+
+        results = {}
+        for idx, (pattern, modifier) in enumerate(batch, 1):
+            recheck = response_json.get(str(idx))
+            # Ensure the expected data structure is present and matches the pattern.
+            if not isinstance(recheck, dict) or recheck.get("source") != pattern:
+                continue
+            results[(pattern, modifier)] = recheck
+        return results
+
+    def _cache_path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + '.json')
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        data = load_json(self._cache_path(key))
+        if not isinstance(data, dict) or data.get("key") != list(key):
+            return None
+        return data.get("recheck")
+
+    def _store(self, key, recheck):
+        if not self.cache_dir:
             return
+        store_json(self._cache_path(key), {"key": list(key), "recheck": recheck})
 
-        # Ensure the expected data structure is present and matches the pattern.
-        if (
-            "1" not in response_json or
-            response_json["1"] is None or
-            "source" not in response_json["1"] or
-            response_json["1"]["source"] != regex_pattern
-        ):
-            self.add_issue(directive=directive, reason=fail_reason, severity=self.unknown_severity)
+    def _report(self, directive, regex_pattern, recheck):
+        if recheck is None:
+            reason = f'Could not check regex {regex_pattern} for ReDoS.'
+            self.add_issue(directive=directive, reason=reason, severity=self.unknown_severity)
             return
 
-        recheck = response_json["1"]
         status = recheck.get("status")
 
         # If status is neither 'vulnerable' nor 'unknown', the expression is safe.
@@ -113,6 +229,6 @@ class regex_redos(Plugin):
             return
 
         # Status is 'vulnerable' here. Report as a high-severity issue.
-        complexity_summary = recheck.get("complexity", {}).get("summary", "unknown")
+        complexity_summary = (recheck.get("complexity") or {}).get("summary", "unknown")
         reason = f'Regex is vulnerable to {complexity_summary} ReDoS: {regex_pattern}.'
         self.add_issue(directive=directive, reason=reason, severity=self.severity)
@@ -0,0 +1,39 @@
+import os
+import json
+import errno
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+def load_json(path):
+    """
+    Returns the JSON content of the file, None if the file is missing or corrupted.
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return None
+    except ValueError:
+        LOG.debug('Ignore corrupted cache entry: %s', path)
+        return None
+
+
+def store_json(path, data):
+    """
+    Writes the data as JSON atomically, so concurrent readers never see a partially written file.
+    The directory is created if needed, failures are logged and ignored.
+    """
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as e:
+        LOG.debug('Failed to store cache entry %s: %s', path, e)
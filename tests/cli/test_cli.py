@@ -4,6 +4,9 @@ Module: test_cli.py
 This module demonstrates how to test the pixy's CLI using pytest.
 """
 
+import os
+import logging
+import json
 import sys
 import pytest
 from gixy.cli.main import main
@@ -26,3 +29,163 @@ def test_cli_help(monkeypatch, capsys):
     # Capture and check the output for expected help text.
     captured = capsys.readouterr()
     assert "usage:" in captured.out.lower()
+
+
+def _run(monkeypatch, capsys, argv):
+    monkeypatch.setattr(sys, "argv", ["gixy"] + argv)
+    with pytest.raises(SystemExit) as e:
+        main()
+    return e.value.code, capsys.readouterr().out
+
+
+def test_cli_jobs(monkeypatch, capsys):
+    """
+    Test that auditing files in worker processes gives the same output and exit code.
+    """
+    simply = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins", "simply")
+    files = [
+        os.path.join(simply, "origins", "metrika.conf"),
+        os.path.join(simply, "origins", "metrika_fp.conf"),
+        os.path.join(simply, "http_splitting", "add_header_uri.conf"),
+    ]
+
+    serial = _run(monkeypatch, capsys, ["-f", "json"] + files)
+    parallel = _run(monkeypatch, capsys, ["-f", "json", "--jobs", "2"] + files)
+
+    assert serial[0] == 1
+    assert parallel == serial
+
+
+def test_cli_config_snippet(monkeypatch, capsys, tmpdir):
+    """
+    Test that the report config contains only the issue directives and their parents in the config order.
+    """
+    config = tmpdir.join("nginx.conf")
+    config.write("""
+http {
+    add_header X-Frame-Options DENY;
+    server {
+        server_name example.com;
+        location /a {
+            add_header X-Content-Type-Options nosniff;
+        }
+        location /b {
+            root /var/www;
+        }
+        location /c {
+            add_header X-Content-Type-Options nosniff;
+        }
+    }
+}
+""")
+
+    code, output = _run(monkeypatch, capsys, ["-f", "json", str(config)])
+    assert code == 1
+    assert json.loads(output)[0]["config"] == (
+        "add_header X-Frame-Options DENY;\n"
+        "\n"
+        "server {\n"
+        "\tserver_name example.com;\n"
+        "\n"
+        "\tlocation /a {\n"
+        "\t\tadd_header X-Content-Type-Options nosniff;\n"
+        "\t}\n"
+        "\n"
+        "\tlocation /c {\n"
+        "\t\tadd_header X-Content-Type-Options nosniff;\n"
+        "\t}\n"
+        "}"
+    )
+
+
+def test_cli_jsonl(monkeypatch, capsys, tmpdir):
+    """
+    Test that JSON Lines output has the same reports as JSON and that config snippets can be omitted.
+    """
+    simply = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins", "simply")
+    files = [
+        os.path.join(simply, "origins", "metrika.conf"),
+        os.path.join(simply, "http_splitting", "add_header_uri.conf"),
+    ]
+
+    _, output = _run(monkeypatch, capsys, ["-f", "json"] + files)
+    expected = json.loads(output)
+
+    code, output = _run(monkeypatch, capsys, ["-f", "jsonl"] + files)
+    assert code == 1
+    assert [json.loads(line) for line in output.splitlines()] == expected
+
+    output_file = tmpdir.join("report.jsonl")
+    code, output = _run(monkeypatch, capsys, ["-f", "jsonl", "--omit-config", "-o", str(output_file)] + files)
+    assert code == 1
+    assert output == ""
+    reports = [json.loads(line) for line in output_file.readlines()]
+    assert len(reports) == len(expected)
+    assert all("config" not in report for report in reports)
+
+
+def test_cli_sarif(monkeypatch, capsys):
+    """
+    Test that SARIF output has a result per report and a rule per plugin.
+    """
+    simply = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins", "simply")
+    files = [
+        os.path.join(simply, "origins", "metrika.conf"),
+        os.path.join(simply, "origins", "referer.conf"),
+        os.path.join(simply, "http_splitting", "add_header_uri.conf"),
+    ]
+
+    _, output = _run(monkeypatch, capsys, ["-f", "json"] + files)
+    expected = json.loads(output)
+
+    code, output = _run(monkeypatch, capsys, ["-f", "sarif"] + files)
+    assert code == 1
+    sarif = json.loads(output)
+    assert sarif["version"] == "2.1.0"
+    run = sarif["runs"][0]
+    rules = [rule["id"] for rule in run["tool"]["driver"]["rules"]]
+    assert sorted(rules) == sorted(set(report["plugin"] for report in expected))
+
+    assert len(run["results"]) == len(expected)
+    for result, report in zip(run["results"], expected):
+        assert result["ruleId"] == report["plugin"]
+        assert rules[result["ruleIndex"]] == report["plugin"]
+        location = result["locations"][0]["physicalLocation"]
+        assert location["artifactLocation"]["uri"].endswith(os.path.basename(report["path"]))
+        assert location["region"]["startLine"] > 0
+
+    code, output = _run(monkeypatch, capsys, ["-f", "sarif", os.path.join(simply, "origins", "origin_fp.conf")])
+    assert json.loads(output)["runs"][0]["results"] == []
+
+
+def test_sarif_artifact_uri(tmpdir, monkeypatch):
+    """
+    Test that SARIF artifact URIs are percent-encoded.
+    """
+    from gixy.formatters.sarif import artifact_uri
+
+    monkeypatch.chdir(str(tmpdir.mkdir("cwd")))
+    assert artifact_uri(os.path.join(os.getcwd(), "sites", "a b#1%.conf")) == "sites/a%20b%231%25.conf"
+    assert artifact_uri("/etc/nginx/a b#1%.conf") == "file:///etc/nginx/a%20b%231%25.conf"
+
+
+def test_cli_jobs_parse_cache_stats(tmpdir, caplog):
+    """
+    Test that the parse cache stats of the worker processes are logged.
+    """
+    from gixy.cli.main import _audit_all
+    from gixy.core.config import Config
+
+    files = []
+    for i in range(3):
+        config = tmpdir.join("{0}.conf".format(i))
+        config.write("server {{ listen {0}; }}".format(8000 + i))
+        files.append(str(config))
+    config = Config(cache_dir=str(tmpdir.join("cache")), jobs=2, output_format="json")
+
+    caplog.set_level(logging.DEBUG)
+    for _ in range(2):
+        list(_audit_all(files, config, debug=False))
+
+    stats = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Parse cache:")]
+    assert stats == ["Parse cache: 0 hits, 3 misses", "Parse cache: 3 hits, 0 misses"]
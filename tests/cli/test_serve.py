@@ -0,0 +1,126 @@
+import os
+import json
+import stat
+import socket
+import threading
+
+import pytest
+
+from gixy.core.config import Config
+from gixy.cli.serve import GixyServer
+
+
+@pytest.fixture
+def server(tmpdir):
+    server = GixyServer(str(tmpdir.join("gixy.sock")), Config())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def _request(server, *requests):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(server.server_address)
+    with sock, sock.makefile("rwb") as f:
+        responses = []
+        for request in requests:
+            f.write((request if isinstance(request, str) else json.dumps(request)).encode("utf-8") + b"\n")
+            f.flush()
+            responses.append(json.loads(f.readline()))
+    return responses
+
+
+def test_serve_audit(server, tmpdir):
+    """
+    Test that the requests over a connection are audited with their own options.
+    """
+    config = tmpdir.join("nginx.conf")
+    config.write("server { location / { add_header X-Uri $uri; } }")
+
+    by_path, inline, skipped = _request(
+        server,
+        {"path": str(config)},
+        {"config": "add_header X-Uri $uri;", "omit_config": True},
+        {"path": str(config), "skips": ["http_splitting"]},
+    )
+
+    assert by_path["path"] == str(config)
+    assert [r["plugin"] for r in by_path["reports"]] == ["http_splitting"]
+    assert "config" in by_path["reports"][0]
+    assert by_path["invalid"] is False
+
+    assert inline["path"] == "<stdin>"
+    assert [r["plugin"] for r in inline["reports"]] == ["http_splitting"]
+    assert "config" not in inline["reports"][0]
+
+    assert skipped["reports"] == []
+    assert sum(skipped["stats"].values()) == 0
+
+
+def test_serve_options(server):
+    """
+    Test that the plugin options are converted to the types of their defaults.
+    """
+    config = "if ($http_origin !~ '^https?://example\\.com$') { return 403; }"
+    disabled, enabled, invalid = _request(
+        server,
+        {"config": config, "tests": ["origins"], "options": {"origins": {"https_only": "false"}}},
+        {"config": config, "tests": ["origins"], "options": {"origins": {"https_only": "true"}}},
+        {"config": config, "options": {"origins": {"https_only": "maybe"}}},
+    )
+
+    assert disabled["reports"] == []
+    assert [r["plugin"] for r in enabled["reports"]] == ["origins"]
+    assert "error" in invalid
+
+
+def test_serve_socket(server):
+    """
+    Test that the socket is accessible by the owner only and a persistent connection does not block the others.
+    """
+    assert stat.S_IMODE(os.stat(server.server_address).st_mode) == 0o600
+
+    idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    idle.connect(server.server_address)
+    with idle:
+        assert _request(server, {"config": "add_header X-Uri $uri;"})[0]["reports"]
+
+
+def test_serve_errors(server, tmpdir):
+    """
+    Test that invalid requests are answered with errors and the connection is kept.
+    """
+    responses = _request(
+        server,
+        "{",
+        {"path": str(tmpdir.join("missing.conf"))},
+        {"config": "server {", "foo": 1},
+        {"config": "server {", "options": {"origins": {"foo": 1}}},
+        {"config": "server {", "disable_includes": "false"},
+        {"config": "server {", "omit_config": "no"},
+        {"config": "server {"},
+    )
+
+    assert all("error" in r for r in responses[:6])
+    assert responses[6]["invalid"] is True
+
+
+def test_serve_changed_include(server, tmpdir):
+    """
+    Test that included files are parsed again once changed.
+    """
+    include = tmpdir.join("headers.conf")
+    include.write("add_header X-Frame-Options DENY;")
+    config = {"config": "server { include headers.conf; }", "path": str(tmpdir.join("nginx.conf"))}
+
+    before = _request(server, config)[0]
+    include.write("add_header X-Uri $uri;")
+    stat = os.stat(str(include))
+    os.utime(str(include), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    after = _request(server, config)[0]
+
+    assert before["reports"] == []
+    assert [r["plugin"] for r in after["reports"]] == ["http_splitting"]
@@ -128,3 +128,17 @@ def test_push_failed_with_regexp_py35_gixy_10():
         get_context().add_var(name, Variable(name=name, value=group))
 
     push_context(Root())
+
+
+def test_clear_index_vars_in_nested_context():
+    push_context(Root())
+    get_context().add_var(1, Variable(1, value='one'))
+
+    push_context(Root())
+    get_context().clear_index_vars()
+    assert get_context().get_var(1) == None
+    get_context().add_var(2, Variable(2, value='two'))
+
+    pop_context()
+    assert get_context().get_var(1).value == 'one'
+    assert get_context().get_var(2) == None
@@ -0,0 +1,26 @@
+import io
+import logging
+
+from gixy.core.manager import Manager
+
+
+CONFIG = b'server { set $a "$uri/"; location / { return 302 https://example.com$a; } }'
+
+
+def _debug_lines(caplog, prefix):
+    return [r.getMessage() for r in caplog.records if r.getMessage().startswith(prefix)]
+
+
+def test_cache_stats_per_audit(caplog):
+    caplog.set_level(logging.DEBUG, logger='gixy.core.manager')
+    for _ in range(2):
+        with Manager() as yoda:
+            yoda.audit('<stdin>', io.BytesIO(CONFIG), is_stdin=True)
+
+    compiled = _debug_lines(caplog, 'Compiled scripts cache')
+    assert len(compiled) == 2
+    assert compiled[0] == compiled[1]
+
+    queries = _debug_lines(caplog, 'Variable queries cache')
+    assert len(queries) == 2
+    assert queries[0] == queries[1]
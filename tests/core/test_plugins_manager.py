@@ -0,0 +1,43 @@
+from gixy.core.plugins_manager import PluginsManager
+
+
+def test_plugins_for():
+    manager = PluginsManager()
+    names = set(name for plugin in manager.plugins for name in plugin.directives)
+    names.add('some_unknown_directive')
+
+    for name in names:
+        expected = [p for p in manager.plugins if not p.directives or name in p.directives]
+        assert list(manager.plugins_for(name)) == expected
+
+
+def test_wildcard_plugins():
+    manager = PluginsManager()
+    wildcard = manager.plugins_for('some_unknown_directive')
+    assert 'if_is_evil' in [p.name for p in wildcard]
+    assert all(not p.directives for p in wildcard)
+
+
+def test_registry_up_to_date():
+    from gixy.core.plugins_manager import build_registry, plugins_digest
+    from gixy.plugins import _registry
+
+    # Regenerate with `python -m gixy.core.plugins_manager` after changing the plugins
+    assert _registry.DIGEST == plugins_digest()
+    assert _registry.PLUGINS == build_registry()
+
+
+def test_only_selected_plugins_imported():
+    import sys
+    import subprocess
+
+    code = (
+        "import sys\n"
+        "from gixy.core.config import Config\n"
+        "from gixy.core.plugins_manager import PluginsManager\n"
+        "manager = PluginsManager(config=Config(plugins=['if_is_evil']))\n"
+        "assert [p.name for p in manager.plugins] == ['if_is_evil']\n"
+        "assert 'gixy.plugins.origins' not in sys.modules\n"
+        "assert 'requests' not in sys.modules\n"
+    )
+    subprocess.check_call([sys.executable, "-c", code])
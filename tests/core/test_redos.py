@@ -0,0 +1,51 @@
+import pytest
+
+from gixy.core.regexp import Regexp
+from gixy.core.redos import analyze
+
+
+@pytest.mark.parametrize('regexp,summary', (
+    (r'^/(a|aa|aaaa)+$', 'exponential'),
+    (r'^(a+)+$', 'exponential'),
+    (r'^(a*)*$', 'exponential'),
+    (r'^(\w+\s?)+$', 'exponential'),
+    (r'^(\w|\d)+$', 'exponential'),
+    (r'^(x+x+)+y$', 'exponential'),
+    (r'^(a{1,100})+$', 'exponential'),
+    (r'^(a|a)*$', 'exponential'),
+    (r'^(ab|ab)*$', 'exponential'),
+    (r'^/(.*)/(.*)$', '2nd degree polynomial'),
+    (r'^\d+\d+$', '2nd degree polynomial'),
+    (r'^(.+)/(.+)/(.+)$', '3rd degree polynomial'),
+))
+def test_vulnerable(regexp, summary):
+    result = analyze(Regexp(regexp))
+    assert result['status'] == 'vulnerable'
+    assert result['complexity']['summary'] == summary
+
+
+@pytest.mark.parametrize('regexp', (
+    r'^(ab+)+$',
+    r'^(a|b)+$',
+    r'^(ab|ac)+$',
+    r'^(a|ab)*$',
+    r'^(a+)+',
+    r'^(a|aa)+b?',
+    r'^a*a*',
+    r'\.php$',
+    r'^/static/(.*)\.(js|css)$',
+    r'^/(?<a>[^/]+)/(?<b>[^/]+)/?$',
+    r'(a|aa){1,5}$',
+    r'^(?:[a-z0-9-]+\.)*example\.com$',
+))
+def test_safe(regexp):
+    assert analyze(Regexp(regexp))['status'] == 'safe'
+
+
+def test_case_insensitive():
+    assert analyze(Regexp(r'^(ab|Ab?)+$'))['status'] == 'safe'
+    assert analyze(Regexp(r'^(ab|Ab?)+$', case_sensitive=False))['status'] == 'vulnerable'
+
+
+def test_too_complex():
+    assert analyze(Regexp(r'^(?:[a-z]{10}){10}(?:[0-9]{10}){10}$'))['status'] == 'unknown'
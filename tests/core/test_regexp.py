@@ -277,6 +277,21 @@ def test_generate(regexp, values):
     assert sorted(reg.generate('|', anchored=True)) == sorted(values)
 
 
+def test_generate_limit():
+    reg = Regexp(r'(?:a|b|[^/])(?:1|2|3)(?:x|y)')
+    values = list(reg.generate('|'))
+    assert len(values) == len(set(values)) == 18
+    assert values[:6] == [v for v in values if '|' in v]
+
+    assert list(reg.generate('|', limit=4)) == values[:4]
+    assert all('|' in v for v in reg.generate('|', limit=6))
+
+
+def test_generate_unique():
+    reg = Regexp(r'(?:a|)(?:a|)b')
+    assert sorted(reg.generate('|')) == ['aab', 'ab', 'b']
+
+
 def test_strict_generate():
     reg = Regexp('^foo|bar', strict=True)
     assert sorted(reg.generate('|', anchored=True)) == sorted(['^foo', '^bar'])
@@ -313,3 +328,37 @@ def test_group_can_contains():
     assert reg.group(1).can_contain('\n'), 'Group 1 from regex "{src}" can contains {sym!r}'.format(src=source, sym='\\n')
 
     assert not reg.group('action').can_contain('/'), 'Group "action" from regex "{src}" CAN\'T (!) contain {sym!r}'.format(src=source, sym='/')
+
+
+def test_get_regexp_interned():
+    from gixy.core.regexp import get_regexp, regexp_cache_info
+
+    regexp = get_regexp('^/(?P<name>[a-z]+)/', case_sensitive=False)
+    hits = regexp_cache_info().hits
+    assert get_regexp('^/(?P<name>[a-z]+)/', strict=False, case_sensitive=0) is regexp
+    assert regexp_cache_info().hits == hits + 1
+    assert get_regexp('^/(?P<name>[a-z]+)/') is not regexp
+    assert get_regexp('^/(?P<name>[a-z]+)/', strict=True, case_sensitive=False) is not regexp
+    assert regexp.group('name').can_contain('a')
+
+
+@pytest.mark.parametrize('regexp', (
+    r'^/(?P<action>[^/:.]+)/(\d+)?$',
+    r'(?:^http|https)://[^\s]*?\.(?:com|ru){1,2}',
+    r'(a|bc*)x{0}(?:[\W\d]|[^\n])+\1',
+    r'[^a-c\S]{0,3}(^foo|.)',
+    r'^(?:a?b)*$',
+))
+@pytest.mark.parametrize('strict', (True, False))
+@pytest.mark.parametrize('case_sensitive', (True, False))
+def test_masks_same_as_tree(regexp, strict, case_sensitive):
+    from gixy.core.regexp import ASCII_CHARS
+
+    reg = Regexp(regexp, strict=strict, case_sensitive=case_sensitive)
+    for char in ASCII_CHARS:
+        tree_char = char if case_sensitive else char.lower()
+        assert reg.can_contain(char) is reg.root.can_contain(tree_char, skip_literal=True)
+        assert reg.can_contain(char, skip_literal=False) is reg.root.can_contain(tree_char, skip_literal=False)
+        assert reg.must_contain(char) is reg.root.must_contain(tree_char)
+        assert reg.can_startswith(char) is reg.root.can_startswith(tree_char, strict=strict)
+        assert reg.must_startswith(char) is reg.root.must_startswith(tree_char, strict=strict)
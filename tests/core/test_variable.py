@@ -91,3 +91,92 @@ def test_script_boundary():
     assert not var.must_contain('a')
     assert var.must_startswith('/')
     assert not var.must_startswith('a')
+
+
+def test_compile_script_cache():
+    from gixy.core.variable import compile_script, compile_script_stats
+
+    get_context().add_var('foo', Variable(name='foo', value='bar', have_script=False))
+    hits = compile_script_stats['hits']
+    first = compile_script('$host$foo')
+    assert compile_script('$host$foo') == first
+    assert compile_script_stats['hits'] == hits + 1
+
+    # Nested scope shares compiled scripts until its variables are changed
+    push_context(Root())
+    assert compile_script('$host$foo') == first
+    assert compile_script_stats['hits'] == hits + 2
+
+    get_context().add_var('foo', Variable(name='foo', value='baz', have_script=False))
+    assert compile_script('$host$foo')[1].value == 'baz'
+    get_context().clear_index_vars()
+    get_context().add_var(1, Variable(name=1, value='one', have_script=False))
+    assert compile_script('$1')[0].value == 'one'
+    get_context().clear_index_vars()
+    assert compile_script('$1') == []
+    assert compile_script_stats['hits'] == hits + 2
+
+
+def test_builtin_variables():
+    import gixy.core.builtin_variables as builtins
+
+    assert builtins.is_builtin('request_uri')
+    assert builtins.is_builtin('http_x_forwarded_for')
+    assert builtins.is_builtin('upstream_cookie_sid')
+    assert not builtins.is_builtin('http')
+    assert not builtins.is_builtin('request_uri_')
+    assert not builtins.is_builtin(1)
+
+    var = builtins.builtin_var('arg_page')
+    assert var.name == 'arg_page'
+    assert var.can_contain('/') and not var.can_contain('&')
+    assert builtins.builtin_var('arg_page') is var
+    assert builtins.builtin_var('server_name').value == 'builtin'
+    assert builtins.builtin_var('my_var') is None
+
+
+def test_query_cache():
+    from gixy.core.variable import variable_query_stats
+
+    var = Variable(name='simple', value='/$uri')
+    assert var.can_contain('\n')
+    assert not var.must_startswith('a')
+
+    hits, misses = variable_query_stats['hits'], variable_query_stats['misses']
+    assert var.can_contain('\n')
+    assert not var.must_startswith('a')
+    assert variable_query_stats['hits'] == hits + 2
+    assert variable_query_stats['misses'] == misses
+
+    # Results are evaluated again once the variables are changed
+    get_context().add_var('foo', Variable(name='foo', value='bar', have_script=False))
+    assert var.can_contain('\n')
+    assert variable_query_stats['hits'] == hits + 2
+    assert variable_query_stats['misses'] > misses
+
+
+def test_final_value():
+    context = get_context()
+    context.add_var('c', Variable(name='c', value='example.com'))
+    context.add_var('b', Variable(name='b', value='$c'))
+    var = Variable(name='a', value='http://$b:$server_port/')
+    assert var.depends[1].name == 'b'
+    assert var.final_value == 'http://example.com:builtin/'
+
+    context.add_var('v0', Variable(name='v0', value='v0', have_script=False))
+    for i in range(1, 1000):
+        context.add_var('v{0}'.format(i), Variable(name='v{0}'.format(i), value='$v{0}/{1}'.format(i - 1, i)))
+    assert context.get_var('v999').final_value == 'v0/' + '/'.join(str(i) for i in range(1, 1000))
+
+
+def test_deep_chain_queries():
+    context = get_context()
+    context.add_var('v0', Variable(name='v0', value='$uri'))
+    for i in range(1, 1000):
+        context.add_var('v{0}'.format(i), Variable(name='v{0}'.format(i), value='$v{0}/'.format(i - 1)))
+
+    var = context.get_var('v999')
+    assert var.can_contain('\n')
+    assert var.can_startswith('/')
+    assert var.must_contain('/')
+    assert not var.must_startswith('a')
@@ -291,3 +291,69 @@ server {
     assert directive.children[0].children[0].name == 'error_log'
     assert isinstance(directive.children[0].children[0].parent, Block)
     assert directive.children[0].children[0].args == ['off']
+
+
+def test_block_find_after_append():
+    config = '''
+    some {
+        directive 1;
+        if (-f /some/) {
+            directive 2;
+        }
+    }
+        '''
+
+    directive = _get_parsed(config)
+    root = directive.parent
+    assert [x.args[0] for x in root.find_recursive('directive')] == ['1', '2']
+    assert directive.find('directive', flat=True)[1].args[0] == '2'
+
+    # Lookup results are copies
+    directive.find('directive').append(None)
+    assert len(directive.find('directive')) == 1
+
+    # Appended directives are found in the parent blocks
+    directive.children[1].append(Directive('directive', ['3']))
+    directive.children[1].append(Directive('other', []))
+    assert [x.args[0] for x in root.find_recursive('directive')] == ['1', '2', '3']
+    assert [x.args[0] for x in directive.find('directive', flat=True)] == ['1', '2', '3']
+    assert directive.some('other').parent is directive.children[1]
+
+
+def test_root_symbols():
+    config = '''
+http {
+  limit_req_zone $binary_remote_addr zone=one:10m rate=1r/s;
+  proxy_cache_path /data/cache levels=1:2 keys_zone=cache:10m;
+  map $uri $mapped { default 1; }
+  geo $geo { default 0; }
+  upstream backend {
+    server backend.example.com;
+  }
+  server {
+    server_name example.com www.example.com;
+    location / {
+      proxy_pass http://backend;
+    }
+  }
+}
+    '''
+
+    http = _get_parsed(config)
+    root = http.parent
+    assert isinstance(root, Root)
+    assert root.get_symbols('upstream', 'backend') == [http.some('upstream')]
+    assert root.get_symbols('server_name', 'www.example.com') == [http.some('server')]
+    assert root.get_symbols('variable', 'mapped') == [http.some('map')]
+    assert root.get_symbols('variable', 'geo') == [http.some('geo')]
+    assert root.get_symbols('zone', 'one') == [http.some('limit_req_zone')]
+    assert root.get_symbols('zone', 'cache') == [http.some('proxy_cache_path')]
+    assert root.get_symbols('upstream', 'example.com') == []
+
+    proxy_pass = http.find_recursive('proxy_pass')[0]
+    assert proxy_pass.find_symbols('upstream', 'backend') == [http.some('upstream')]
+
+    # Symbols of appended directives are found as well
+    upstream = Block('upstream', ['other'])
+    http.append(upstream)
+    assert proxy_pass.find_symbols('upstream', 'other') == [upstream]
@@ -0,0 +1,160 @@
+import os
+
+import pytest
+
+from gixy.parser.raw_parser import RawParser
+from gixy.parser.fast_parser import FastRawParser
+from gixy.parser.cache import ParseCache, dump_tree, load_tree
+from gixy.parser.nginx_parser import NginxParser
+
+CONFIG = '''
+http {
+    # comment
+    map $uri $foo {
+        default 1;
+        include map.conf;
+    }
+    server {
+        if ($request_method = POST) {
+            return 405;
+        }
+        location ~* ^/(a|b)$ {
+            add_header X-Foo "bar baz";
+        }
+        content_by_lua_block { ngx.say("x") }
+    }
+}
+'''
+
+
+@pytest.mark.parametrize('parser', [RawParser(), FastRawParser()])
+def test_dump_load(parser):
+    tree = parser.parse(CONFIG)
+    restored = load_tree(dump_tree(tree))
+    assert restored.asList() == tree.asList()
+    assert dump_tree(restored) == dump_tree(tree)
+
+
+def test_disk_cache(tmpdir):
+    cache = ParseCache(cache_dir=str(tmpdir))
+    parser = RawParser()
+
+    tree = cache.parse(parser, CONFIG)
+    assert cache.stats == {'hits': 0, 'misses': 1}
+
+    cached = ParseCache(cache_dir=str(tmpdir)).parse(parser, CONFIG)
+    assert dump_tree(cached) == dump_tree(tree)
+
+    cache.parse(parser, CONFIG + '\nuser http;')
+    cache.parse(parser, CONFIG)
+    assert cache.stats == {'hits': 1, 'misses': 2}
+
+
+def test_corrupted_entry(tmpdir):
+    cache = ParseCache(cache_dir=str(tmpdir))
+    cache.parse(RawParser(), CONFIG)
+    for root, _, files in os.walk(str(tmpdir)):
+        for name in files:
+            with open(os.path.join(root, name), 'w') as f:
+                f.write('{')
+
+    tree = cache.parse(RawParser(), CONFIG)
+    assert tree.asList() == RawParser().parse(CONFIG).asList()
+    assert cache.stats == {'hits': 0, 'misses': 2}
+
+
+def test_without_cache_dir(tmpdir):
+    cache = ParseCache()
+    cache.parse(RawParser(), CONFIG)
+    assert cache.stats == {'hits': 0, 'misses': 0}
+
+
+class CountingParser(RawParser):
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, data):
+        self.calls += 1
+        return super(CountingParser, self).parse(data)
+
+
+def test_include_parsed_once(tmpdir):
+    tmpdir.join('headers.conf').write('add_header X-Frame-Options DENY;')
+    config = 'http {' + 'server { include headers.conf; }' * 3 + '}'
+
+    parser = NginxParser(cwd=str(tmpdir), allow_includes=True)
+    parser.parser = CountingParser()
+    root = parser.parse(config)
+
+    assert parser.parser.calls == 2
+    headers = root.find_recursive('add_header')
+    assert len(headers) == 3
+    assert len(set(h.parent for h in headers)) == 3
+
+
+def test_changed_file_parsed_again(tmpdir):
+    headers = tmpdir.join('headers.conf')
+    headers.write('add_header X-Frame-Options DENY;')
+    cache = ParseCache()
+    parser = CountingParser()
+
+    cache.parse_file(parser, str(headers))
+    cache.parse_file(parser, str(headers))
+    assert parser.calls == 1
+
+    headers.write('add_header X-Frame-Options SAMEORIGIN;')
+    assert cache.parse_file(parser, str(headers)).asList() == [['add_header', 'X-Frame-Options', 'SAMEORIGIN']]
+    assert parser.calls == 2
+
+
+def _dump_directives(block):
+    return [(d.name, d.args, _dump_directives(d) if d.is_block else None) for d in block.children]
+
+
+def test_parallel_includes(tmpdir):
+    tmpdir.mkdir('sites')
+    tmpdir.mkdir('snippets')
+    tmpdir.join('snippets', 'headers.conf').write('add_header X-Frame-Options DENY;')
+    tmpdir.join('snippets', 'proxy.conf').write('proxy_set_header Host $host; include snippets/headers.conf;')
+    for i in range(5):
+        tmpdir.join('sites', '{0}.conf'.format(i)).write(
+            'server {{ server_name site{0}; location / {{ include snippets/proxy.conf; }} }}'.format(i))
+    config = 'http { include snippets/headers.conf; include sites/*.conf; }'
+
+    expected = NginxParser(cwd=str(tmpdir), allow_includes=True).parse(config)
+
+    cache = ParseCache(jobs=3)
+    try:
+        actual = NginxParser(cwd=str(tmpdir), allow_includes=True, cache=cache).parse(config)
+    finally:
+        cache.close()
+
+    assert _dump_directives(actual) == _dump_directives(expected)
+    assert len(actual.find_recursive('add_header')) == 6
+
+
+def test_refresh(tmpdir):
+    tmpdir.join('a.conf').write('add_header X-Frame-Options DENY;')
+    tmpdir.join('b.conf').write('add_header X-Frame-Options DENY;')
+    cache = ParseCache()
+    parser = CountingParser()
+    for path in cache.glob(str(tmpdir), '*.conf'):
+        cache.parse_file(parser, path)
+
+    tmpdir.join('b.conf').remove()
+    tmpdir.join('c.conf').write('add_header X-Frame-Options DENY;')
+    cache.refresh()
+
+    assert sorted(os.path.basename(p) for p in cache.glob(str(tmpdir), '*.conf')) == ['a.conf', 'c.conf']
+    assert list(cache._files) == [cache.file_key(parser, str(tmpdir.join('a.conf')))]
+
+
+def test_parsers_do_not_share_trees(tmpdir):
+    headers = tmpdir.join('headers.conf')
+    headers.write('add_header X-Frame-Options DENY;')
+    for cache in (ParseCache(), ParseCache(cache_dir=str(tmpdir.mkdir('cache')))):
+        raw = cache.parse_file(RawParser(), str(headers))
+        fast = cache.parse_file(FastRawParser(), str(headers))
+        assert raw is not fast
+        assert cache.parse(RawParser(), CONFIG) is not cache.parse(FastRawParser(), CONFIG)
+        assert cache.misses == (4 if cache.cache_dir else 0)
@@ -0,0 +1,88 @@
+import os
+from os import path
+
+import pytest
+from pyparsing import ParseException
+
+from gixy.parser.raw_parser import RawParser
+from gixy.parser.fast_parser import FastRawParser
+from gixy.parser.conditions import parse_condition
+
+
+def _corpus():
+    tests_dir = path.dirname(path.dirname(__file__))
+    for root, _, files in os.walk(tests_dir):
+        for name in sorted(files):
+            if name.endswith('.conf'):
+                yield path.relpath(path.join(root, name), tests_dir)
+
+
+def _positions(tokens):
+    result = []
+    for token in tokens:
+        if not hasattr(token, 'getName') or token.getName() == 'comment':
+            continue
+        result.append((token.getName(), token.get('line'), token.get('col')))
+        if token.getName() == 'block':
+            result.extend(_positions(token[-1]))
+    return result
+
+
+@pytest.mark.parametrize('config_path', sorted(_corpus()))
+def test_same_as_pyparsing(config_path):
+    with open(path.join(path.dirname(path.dirname(__file__)), config_path), 'rb') as f:
+        data = f.read()
+
+    expected = RawParser().parse(data)
+    actual = FastRawParser().parse(data)
+    assert actual.asList() == expected.asList()
+    assert _positions(actual) == _positions(expected)
+
+
+def test_line_numbers():
+    config = '''
+http {
+\tserver {
+\t\tlisten 80;
+\t}
+}
+    '''
+
+    tree = FastRawParser().parse(config)
+    assert (tree[0].get('line'), tree[0].get('col')) == (1, 1)
+    server = tree[0][2][0]
+    assert (server.get('line'), server.get('col')) == (2, 9)
+    assert (server[2][0].get('line'), server[2][0].get('col')) == (3, 17)
+
+
+@pytest.mark.parametrize('config', [
+    'http {',
+    'server { listen 80; }}',
+    '}',
+    'add_header X-Foo "bar"',
+])
+def test_invalid(config):
+    with pytest.raises(ParseException):
+        RawParser().parse(config)
+    with pytest.raises(ParseException):
+        FastRawParser().parse(config)
+
+
+@pytest.mark.parametrize('condition,expected', [
+    ('$request_method = POST', ['$request_method', '=', 'POST']),
+    ('!-f $request_filename', ['!-f', '$request_filename']),
+    ('$http_user_agent ~* "(foo|bar)"', ['$http_user_agent', '~*', '(foo|bar)']),
+    ('$slow', ['$slow']),
+    ('$foo =bar', ['$foo']),
+])
+def test_condition(condition, expected):
+    text = '({0})'.format(condition)
+    assert parse_condition(text, 1, len(text) - 1) == expected
+
+
+def test_unparsable_block_logged(caplog):
+    config = 'http {\n    server {\n        listen 80;\n        content_by_lua_block {\n            ngx.say("x")\n        }\n    }\n}\n'
+
+    FastRawParser().parse(config)
+    messages = [r.getMessage() for r in caplog.records if r.name == 'gixy.parser.raw_parser']
+    assert messages == ["Detected unparsable content inside block beginning at line 4: 'ngx.say(\"x\")'."]
@@ -110,6 +110,19 @@ def test_encoding():
         _parse(config)
 
 
+def test_location(tmpdir):
+    tmpdir.join('headers.conf').write('# headers\nadd_header X-Frame-Options DENY;')
+    config = tmpdir.join('nginx.conf')
+    config.write('http {\n    server {\n        include headers.conf;\n        listen 80;\n    }\n}')
+
+    tree = NginxParser(cwd=str(tmpdir), allow_includes=True).parse_file(str(config))
+    server = tree.some('http').some('server')
+    assert (server.filename, server.line) == (str(config), 2)
+    assert (server.some('listen').filename, server.some('listen').line) == (str(config), 4)
+    header = server.some('add_header')
+    assert (header.filename, header.line) == (str(tmpdir.join('headers.conf')), 2)
+
+
 def assert_config(config, expected):
     tree = _parse(config)
     assert isinstance(tree, Directive)
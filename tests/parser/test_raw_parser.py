@@ -1,4 +1,5 @@
 from gixy.parser.raw_parser import *
+from gixy.parser.fast_parser import FastRawParser
 
 
 def test_directive():
@@ -633,10 +634,68 @@ def test_national_comment_decoding():
 add_header X-Test "Windows-1251";
         """
 
-    actual = RawParser().parse(config)
-    assert len(actual.asList()) == 2
+    for parser in (RawParser(), FastRawParser()):
+        actual = parser.parse(config)
+        assert len(actual.asList()) == 2
 
 
 def assert_config(config, expected):
+    for parser in (RawParser(), FastRawParser()):
+        actual = parser.parse(config)
+        assert actual.asList() == expected
+
+
+def test_line_index():
+    from pyparsing import lineno, col
+
+    text = '\nhttp {\n    # comment\n\n  server {listen 80;}\n}\n'
+    index = LineIndex(text)
+    for loc in range(len(text) + 1):
+        assert index.position(loc) == (lineno(loc, text), col(loc, text))
+
+
+def test_comment_line_number():
+    config = '''
+add_header X-Test "Windows-1251";
+# some comment
+    '''
+
     actual = RawParser().parse(config)
-    assert actual.asList() == expected
+    assert actual[1].getName() == 'comment'
+    assert actual[1].get('line') == 2
+
+
+def test_if_condition_modifiers():
+    config = r"""
+if ($request_uri !~* "^/(a(b)c)\"x$") { return 403; }
+if (!-f $request_filename) { return 404; }
+if ($args ~ (foo(bar))baz) { }
+if ( $a = 'b c' ) { }
+    """
+
+    expected = [
+        ["if", ["$request_uri", "!~*", '^/(a(b)c)"x$'], [["return", "403"]]],
+        ["if", ["!-f", "$request_filename"], [["return", "404"]]],
+        ["if", ["$args", "~", "(foo(bar))baz"], []],
+        ["if", ["$a", "=", "b c"], []],
+    ]
+
+    assert_config(config, expected)
+
+
+UNPARSABLE_CONFIG = '''
+http {
+    server {
+        listen 80;
+        content_by_lua_block {
+            ngx.say("x")
+        }
+    }
+}
+'''
+
+
+def test_unparsable_block_logged(caplog):
+    RawParser().parse(UNPARSABLE_CONFIG)
+    messages = [r.getMessage() for r in caplog.records if r.name == 'gixy.parser.raw_parser']
+    assert messages == ["Detected unparsable content inside block beginning at line 4: 'ngx.say(\"x\")'."]
@@ -0,0 +1,93 @@
+import json
+import threading
+from io import StringIO
+
+import pytest
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from gixy.core.manager import Manager
+from gixy.core.config import Config
+
+CONFIG = '''
+server {
+    server_name ~^(www\\.)?example\\.com$;
+    location ~ ^/(a|aa)+$ {
+        rewrite ^/(a|aa)+$ /index.html;
+    }
+    location ~* ^/(a|aa)+$ {
+        return 200;
+    }
+    location ~ ^/static/ {
+        return 200;
+    }
+}
+'''
+
+
+class RecheckHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.batches.append(body)
+        result = {}
+        for idx, item in body.items():
+            vulnerable = '(a|aa)+' in item['pattern']
+            result[idx] = {
+                'source': item['pattern'],
+                'status': 'vulnerable' if vulnerable else 'safe',
+                'complexity': {'summary': 'exponential' if vulnerable else 'linear'},
+            }
+        data = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def recheck_server():
+    server = HTTPServer(('127.0.0.1', 0), RecheckHandler)
+    server.batches = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _audit(server, cache_dir, **options):
+    config = Config(plugins=['regex_redos'])
+    options['url'] = 'http://127.0.0.1:{0}/'.format(server.server_address[1])
+    options['cache_dir'] = cache_dir
+    config.set_for('regex_redos', options)
+    with Manager(config=config) as yoda:
+        yoda.audit('nginx.conf', StringIO(CONFIG))
+        return sorted((issue.severity, issue.reason) for plugin in yoda.results for issue in plugin.issues)
+
+
+def test_batched_requests(recheck_server, tmpdir):
+    issues = _audit(recheck_server, str(tmpdir), batch_size=2, concurrency=2)
+
+    assert len(issues) == 3
+    assert all(severity == 'HIGH' for severity, _ in issues)
+    # 4 unique (regex, modifier) pairs in 2 batches
+    assert sorted(len(batch) for batch in recheck_server.batches) == [2, 2]
+
+    del recheck_server.batches[:]
+    assert _audit(recheck_server, str(tmpdir)) == issues
+    assert recheck_server.batches == []
+
+
+def test_server_unavailable(tmpdir):
+    config = Config(plugins=['regex_redos'])
+    config.set_for('regex_redos', {'url': 'http://127.0.0.1:1/', 'cache_dir': str(tmpdir)})
+    with Manager(config=config) as yoda:
+        yoda.audit('nginx.conf', StringIO(CONFIG))
+        issues = [issue for plugin in yoda.results for issue in plugin.issues]
+
+    assert len(issues) == 5
+    assert all(issue.reason.startswith('Could not check regex') for issue in issues)